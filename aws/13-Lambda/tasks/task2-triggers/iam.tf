@@ -121,6 +121,30 @@ resource "aws_iam_role_policy" "sqs_access" {
   })
 }
 
+# Idempotency Table Policy
+resource "aws_iam_role_policy" "idempotency" {
+  count = var.enable_sqs && var.enable_idempotency_table ? 1 : 0
+
+  name = "${var.project_name}-${var.environment}-idempotency"
+  role = aws_iam_role.lambda_role.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:PutItem",
+          "dynamodb:DeleteItem"
+        ]
+        Resource = [
+          aws_dynamodb_table.idempotency[0].arn
+        ]
+      }
+    ]
+  })
+}
+
 # EventBridge Policy
 resource "aws_iam_role_policy" "eventbridge" {
   count = var.enable_eventbridge ? 1 : 0
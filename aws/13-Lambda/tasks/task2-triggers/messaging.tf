@@ -150,6 +150,126 @@ resource "aws_sns_topic_subscription" "sns_to_sqs" {
   raw_message_delivery = true
 }
 
+# Queue handler (src/queue_handler.py) for SQS and SNS records
+resource "aws_lambda_function" "queue" {
+  count = var.enable_sqs ? 1 : 0
+
+  filename         = data.archive_file.handlers_zip.output_path
+  source_code_hash = data.archive_file.handlers_zip.output_base64sha256
+  function_name    = "${var.project_name}-${var.environment}-queue"
+  role             = aws_iam_role.lambda_role.arn
+  handler          = "queue_handler.handler"
+  runtime          = var.lambda_runtime
+  memory_size      = var.lambda_memory_size
+  timeout          = var.lambda_timeout
+  layers           = [aws_lambda_layer_version.dependencies.arn]
+
+  environment {
+    variables = merge(
+      var.environment_variables,
+      {
+        ENVIRONMENT     = var.environment
+        IDEMPOTENCY_TTL = tostring(var.idempotency_ttl_seconds)
+        # A claim cannot legitimately outlive the invocation that made it, so
+        # a crashed invocation's claim stops blocking retries after the timeout
+        IDEMPOTENCY_LOCK_SECONDS = tostring(var.lambda_timeout)
+      },
+      var.enable_idempotency_table ? {
+        IDEMPOTENCY_TABLE = aws_dynamodb_table.idempotency[0].name
+      } : {}
+    )
+  }
+
+  depends_on = [aws_cloudwatch_log_group.queue]
+
+  tags = merge(var.tags, {
+    Name        = "${var.project_name}-queue"
+    Environment = var.environment
+  })
+}
+
+data "archive_file" "handlers_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/src"
+  output_path = "${path.module}/dist/handlers.zip"
+}
+
+# Dependencies from src/requirements.txt (numpy and the pinned boto3/botocore)
+# as a layer. Layers come before the runtime's bundled SDK on sys.path, so
+# the pinned botocore is the one the handlers import. Wheels are fetched for
+# the Lambda platform, so the build host needs pip but not Python 3.9.
+locals {
+  dependencies_dir = "${path.module}/build/dependencies"
+}
+
+resource "null_resource" "dependencies" {
+  triggers = {
+    requirements = filemd5("${path.module}/src/requirements.txt")
+    runtime      = var.lambda_runtime
+  }
+
+  provisioner "local-exec" {
+    command = <<-EOT
+      rm -rf ${local.dependencies_dir}
+      pip install -r ${path.module}/src/requirements.txt -t ${local.dependencies_dir}/python \
+        --platform manylinux2014_x86_64 --implementation cp \
+        --python-version ${trimprefix(var.lambda_runtime, "python")} --only-binary=:all:
+    EOT
+  }
+}
+
+data "archive_file" "dependencies_zip" {
+  type        = "zip"
+  source_dir  = local.dependencies_dir
+  output_path = "${path.module}/dist/dependencies.zip"
+
+  depends_on = [null_resource.dependencies]
+}
+
+resource "aws_lambda_layer_version" "dependencies" {
+  layer_name          = "${var.project_name}-${var.environment}-dependencies"
+  filename            = data.archive_file.dependencies_zip.output_path
+  source_code_hash    = data.archive_file.dependencies_zip.output_base64sha256
+  compatible_runtimes = [var.lambda_runtime]
+}
+
+# SQS Event Source for the queue handler. With ReportBatchItemFailures only
+# the messages listed in batchItemFailures are retried; the rest are deleted
+# by Lambda, so the handler makes no DeleteMessage calls of its own.
+resource "aws_lambda_event_source_mapping" "queue" {
+  count = var.enable_sqs ? 1 : 0
+
+  event_source_arn        = aws_sqs_queue.main[0].arn
+  function_name           = aws_lambda_function.queue[0].arn
+  batch_size              = var.sqs_batch_size
+  function_response_types = ["ReportBatchItemFailures"]
+}
+
+# Idempotency table shared by queue handler containers (IDEMPOTENCY_TABLE)
+resource "aws_dynamodb_table" "idempotency" {
+  count = var.enable_sqs && var.enable_idempotency_table ? 1 : 0
+
+  name         = "${var.project_name}-${var.environment}-idempotency"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "id"
+
+  attribute {
+    name = "id"
+    type = "S"
+  }
+
+  # Records expire after idempotency_ttl_seconds (IDEMPOTENCY_TTL)
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = merge(var.tags, {
+    Name        = "${var.project_name}-idempotency"
+    Environment = var.environment
+  })
+}
+
 # CloudWatch Log Group for Queue Processing
 resource "aws_cloudwatch_log_group" "queue" {
   count = var.enable_sqs ? 1 : 0
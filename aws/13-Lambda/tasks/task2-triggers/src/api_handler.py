@@ -1,18 +1,19 @@
 import json
-import logging
 import os
 import traceback
 from datetime import datetime
 
-# Configure logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+from lambda_utils import get_logger, log_payload, start_invocation
+
+# Configure logging (level, sampling and payload size are set in lambda_utils)
+logger = get_logger()
 
 def handler(event, context):
     """
     Lambda handler for API Gateway events
     """
-    logger.info(f"Processing API Gateway event: {json.dumps(event)}")
+    start_invocation()
+    log_payload("Processing API Gateway event", event)
     
     try:
         # Get environment
@@ -99,7 +100,7 @@ def process_request(request):
         'data': data
     }
     
-    logger.info(f"Processed request: {json.dumps(result)}")
+    log_payload("Processed request", result)
     return result
 
 def create_response(status_code, body):
@@ -0,0 +1,145 @@
+import logging
+import os
+from itertools import repeat
+
+try:
+    import numpy as np
+except ImportError:  # the sorted-list fallback gives the same numbers, only slower
+    np = None
+
+logger = logging.getLogger()
+
+# Percentiles reported for every numeric field
+DATA_PERCENTILES = [float(p) for p in os.environ.get('DATA_PERCENTILES', '50,90,95,99').split(',') if p]
+# JSON numbers decode to exactly these types; bool is excluded on purpose
+NUMERIC_TYPES = (int, float)
+
+
+def numeric_column(values):
+    """
+    float64 array of the numeric entries of a list, NaN excluded
+    """
+    types = set(map(type, values))
+    if types.isdisjoint(NUMERIC_TYPES):
+        return np.empty(0)
+    if types <= set(NUMERIC_TYPES):
+        # The common case: every record carries a number, converted in C
+        column = np.array(values, dtype=np.float64)
+    else:
+        column = np.fromiter(
+            (value if type(value) in NUMERIC_TYPES else np.nan for value in values),
+            dtype=np.float64, count=len(values)
+        )
+    return column[~np.isnan(column)]
+
+
+def extract_columns(records):
+    """
+    Numeric columns of a data message: dict records give one column per
+    numeric attribute, bare numbers a 'value' column. Other values (and NaN)
+    are ignored.
+
+    With NumPy each field is gathered with one C-level pass over the records
+    and converted in bulk, with a per-value check only for fields that mix
+    in non-numbers. Without it, records are walked once and columns are lists.
+    """
+    if np is None:
+        columns = {}
+        for record in records:
+            items = record.items() if isinstance(record, dict) else (('value', record),)
+            for name, value in items:
+                if type(value) in NUMERIC_TYPES and value == value:
+                    columns.setdefault(name, []).append(value)
+        return columns
+
+    rows = [record for record in records if isinstance(record, dict)]
+    names = list(rows[0]) if rows else []
+    names += sorted(set().union(*rows).difference(names))
+    if len(rows) < len(records) and 'value' not in names:
+        names.append('value')
+
+    columns = {}
+    for name in names:
+        if name == 'value' and len(rows) < len(records):
+            # Bare numbers share the 'value' column with dict attributes of that name
+            values = [record.get('value') if isinstance(record, dict) else record for record in records]
+        else:
+            values = list(map(dict.get, rows, repeat(name)))
+        column = numeric_column(values)
+        if column.size:
+            columns[name] = column
+    return columns
+
+
+def percentile_name(p):
+    return f"p{p:g}".replace('.', '_')
+
+
+def summarize(values):
+    """
+    count, sum, min, max, mean and DATA_PERCENTILES of one column
+    """
+    if np is not None:
+        array = np.asarray(values, dtype=np.float64)
+        summary = {
+            'count': int(array.size),
+            'sum': float(array.sum()),
+            'min': float(array.min()),
+            'max': float(array.max()),
+            'mean': float(array.mean())
+        }
+        if DATA_PERCENTILES:
+            for p, value in zip(DATA_PERCENTILES, np.percentile(array, DATA_PERCENTILES)):
+                summary[percentile_name(p)] = float(value)
+        return summary
+
+    ordered = sorted(float(value) for value in values)
+    total = sum(ordered)
+    summary = {
+        'count': len(ordered),
+        'sum': total,
+        'min': ordered[0],
+        'max': ordered[-1],
+        'mean': total / len(ordered)
+    }
+    for p in DATA_PERCENTILES:
+        # Linear interpolation between closest ranks, as numpy.percentile does
+        rank = (len(ordered) - 1) * p / 100
+        low = int(rank)
+        high = min(low + 1, len(ordered) - 1)
+        summary[percentile_name(p)] = ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+    return summary
+
+
+class DatasetAggregator:
+    """
+    Collects the columns of every data message in a batch, grouped by dataset,
+    and summarizes each column once over the whole batch
+    """
+
+    def __init__(self):
+        self.datasets = {}
+
+    def add(self, dataset, columns, record_count):
+        entry = self.datasets.setdefault(dataset, {'messages': 0, 'records': 0, 'columns': {}})
+        entry['messages'] += 1
+        entry['records'] += record_count
+        for name, values in columns.items():
+            entry['columns'].setdefault(name, []).append(values)
+
+    def summaries(self):
+        summaries = {}
+        for dataset, entry in self.datasets.items():
+            fields = {}
+            for name, chunks in entry['columns'].items():
+                if np is not None:
+                    values = np.concatenate([np.asarray(chunk, dtype=np.float64) for chunk in chunks])
+                else:
+                    values = [value for chunk in chunks for value in chunk]
+                fields[name] = summarize(values)
+            summaries[dataset] = {
+                'messages': entry['messages'],
+                'records': entry['records'],
+                'fields': fields
+            }
+        return summaries
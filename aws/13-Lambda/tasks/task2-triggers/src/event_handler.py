@@ -1,13 +1,12 @@
-import json
-import logging
 import os
 import boto3
 import traceback
 from datetime import datetime
 
-# Configure logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+from lambda_utils import get_logger, log_payload, start_invocation
+
+# Configure logging (level, sampling and payload size are set in lambda_utils)
+logger = get_logger()
 
 # Initialize AWS clients
 events_client = boto3.client('events')
@@ -16,7 +15,8 @@ def handler(event, context):
     """
     Lambda handler for EventBridge events
     """
-    logger.info(f"Processing EventBridge event: {json.dumps(event)}")
+    start_invocation()
+    log_payload("Processing EventBridge event", event)
     
     try:
         # Get environment
@@ -152,5 +152,5 @@ def process_custom_event(detail):
         'data': event_data
     }
     
-    logger.info(f"Processed custom event: {json.dumps(processed_data)}")
+    log_payload("Processed custom event", processed_data)
     return processed_data 
\ No newline at end of file
@@ -0,0 +1,211 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+logger = logging.getLogger()
+
+# What identifies a record: 'message_id' (SQS messageId / SNS MessageId) or
+# 'payload' (SHA-256 of the body, which also catches the same payload
+# published twice under different message IDs)
+IDEMPOTENCY_KEY = os.environ.get('IDEMPOTENCY_KEY', 'message_id')
+# How long a processed record is remembered, in seconds
+IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', '3600'))
+# Records kept by the in-process tier (0 disables it)
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', '10000'))
+# Optional DynamoDB tier shared by all containers; the table needs a string
+# partition key 'id' and TTL enabled on 'expires_at'
+IDEMPOTENCY_TABLE = os.environ.get('IDEMPOTENCY_TABLE')
+# How long a claim blocks other consumers while its record is processed
+IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get('IDEMPOTENCY_LOCK_SECONDS', '300'))
+
+# Outcomes of IdempotencyStore.claim()
+CLAIMED = 'CLAIMED'
+COMPLETED = 'COMPLETED'
+IN_PROGRESS = 'IN_PROGRESS'
+
+
+def record_key(record, key_mode=IDEMPOTENCY_KEY):
+    """
+    Idempotency key of an SQS or SNS record
+    """
+    if 'Sns' in record:
+        message_id = record['Sns']['MessageId']
+        body = record['Sns'].get('Message', '')
+    else:
+        message_id = record['messageId']
+        body = record.get('body', '')
+
+    if key_mode == 'payload':
+        return 'payload#' + hashlib.sha256(body.encode('utf-8')).hexdigest()
+    return 'message#' + message_id
+
+
+class SeenCache:
+    """
+    LRU of processed keys with a TTL, kept at module level so it survives warm invocations
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            expires = self._entries.get(key)
+            if expires is None:
+                return False
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, key):
+        with self._lock:
+            self._entries[key] = time.monotonic() + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class IdempotencyStore:
+    """
+    Two-tier record deduplication.
+
+    claim() returns COMPLETED for a record that was already processed and
+    CLAIMED for one the caller should process, then call complete(), or
+    release() if processing failed so a retry is not mistaken for a
+    duplicate. With a DynamoDB table, claim() is a conditional put, so
+    concurrent containers receiving the same message process it only once;
+    it returns IN_PROGRESS while another claim holds the record, including
+    one left by an invocation that crashed or timed out. The caller must not
+    treat that as processed: the record is retried until the claim completes
+    or its lock expires.
+    """
+
+    def __init__(self, cache=None, table_name=None, ttl=IDEMPOTENCY_TTL,
+                 lock_seconds=IDEMPOTENCY_LOCK_SECONDS, client=None):
+        self.cache = cache
+        self.table_name = table_name
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self.client = client or (boto3.client('dynamodb') if table_name else None)
+        self.counters = {'cache_hits': 0, 'store_hits': 0, 'in_progress': 0, 'misses': 0, 'errors': 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def claim(self, key):
+        """
+        CLAIMED if the record should be processed, COMPLETED if it is a
+        duplicate, IN_PROGRESS if another claim holds it
+        """
+        if self.cache is not None and key in self.cache:
+            self._count('cache_hits')
+            return COMPLETED
+        if self.client is None:
+            self._count('misses')
+            return CLAIMED
+
+        now = int(time.time())
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={
+                    'id': {'S': key},
+                    'status': {'S': IN_PROGRESS},
+                    'expires_at': {'N': str(now + self.lock_seconds)}
+                },
+                # Items past expires_at may not have been removed by TTL yet
+                ConditionExpression='attribute_not_exists(#id) OR #expires_at < :now',
+                ExpressionAttributeNames={'#id': 'id', '#expires_at': 'expires_at'},
+                ExpressionAttributeValues={':now': {'N': str(now)}},
+                ReturnValuesOnConditionCheckFailure='ALL_OLD'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                status = e.response.get('Item', {}).get('status', {}).get('S')
+                if status == COMPLETED:
+                    self._count('store_hits')
+                    return COMPLETED
+                # Still running elsewhere, or its invocation died before
+                # complete() or release(); only a retry can tell
+                self._count('in_progress')
+                return IN_PROGRESS
+            # Without the store we cannot tell, so process rather than drop the record
+            logger.warning(f"Idempotency store unavailable, processing {key}: {str(e)}")
+            self._count('errors')
+        except BotoCoreError as e:
+            # Connection errors and timeouts: same as an unavailable store
+            logger.warning(f"Idempotency store unavailable, processing {key}: {str(e)}")
+            self._count('errors')
+        self._count('misses')
+        return CLAIMED
+
+    def complete(self, key):
+        """
+        Remember a processed record for the TTL
+        """
+        if self.cache is not None:
+            self.cache.add(key)
+        if self.client is None:
+            return
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={
+                    'id': {'S': key},
+                    'status': {'S': COMPLETED},
+                    'expires_at': {'N': str(int(time.time()) + self.ttl)}
+                }
+            )
+        except (ClientError, BotoCoreError) as e:
+            # The record is processed either way; a redelivery may run it again
+            logger.warning(f"Could not record {key} as processed: {str(e)}")
+            self._count('errors')
+
+    def release(self, key):
+        """
+        Drop the claim of a record that failed, so its retry is processed
+        """
+        if self.client is None:
+            return
+        try:
+            self.client.delete_item(
+                TableName=self.table_name,
+                Key={'id': {'S': key}},
+                ConditionExpression='#status = :in_progress',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={':in_progress': {'S': IN_PROGRESS}}
+            )
+        except (ClientError, BotoCoreError) as e:
+            if not isinstance(e, ClientError) or e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                logger.warning(f"Could not release {key}: {str(e)}")
+                self._count('errors')
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats['cached'] = len(self.cache) if self.cache is not None else 0
+        return stats
+
+
+def build_store():
+    """
+    Store configured from the environment
+    """
+    cache = SeenCache(IDEMPOTENCY_CACHE_SIZE, IDEMPOTENCY_TTL) if IDEMPOTENCY_CACHE_SIZE > 0 else None
+    return IdempotencyStore(cache=cache, table_name=IDEMPOTENCY_TABLE)
@@ -0,0 +1,62 @@
+import json
+import logging
+import os
+import random
+
+# Logging and response settings shared by the trigger handlers
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+# Share of invocations whose event and result payloads are logged (0..1);
+# errors and summary lines are always logged
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '1'))
+# Logged payloads are cut to this many characters (0 logs them whole)
+LOG_MAX_PAYLOAD = int(os.environ.get('LOG_MAX_PAYLOAD', '4096'))
+# 'full' returns every per-record result, 'compact' only counts and the
+# identifiers of failed records
+RESPONSE_MODE = os.environ.get('RESPONSE_MODE', 'full')
+
+_sampled = True
+
+
+def get_logger():
+    """
+    Root logger at LOG_LEVEL, as used by the Lambda runtime
+    """
+    logger = logging.getLogger()
+    logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    return logger
+
+
+def start_invocation():
+    """
+    Decide once per invocation whether its payloads are logged
+    """
+    global _sampled
+    _sampled = LOG_SAMPLE_RATE >= 1 or random.random() < LOG_SAMPLE_RATE
+    return _sampled
+
+
+def truncate(text, limit=LOG_MAX_PAYLOAD):
+    if limit and len(text) > limit:
+        return f"{text[:limit]}... [{len(text) - limit} more characters]"
+    return text
+
+
+def log_payload(message, payload, level=logging.INFO):
+    """
+    Log a payload as JSON, serializing it only when the level is enabled
+    and the invocation is sampled
+    """
+    logger = logging.getLogger()
+    if not _sampled or not logger.isEnabledFor(level):
+        return
+    logger.log(level, f"{message}: {truncate(json.dumps(payload, default=str))}")
+
+
+def compact_body(body, list_keys, failed_ids):
+    """
+    Replace per-record lists of a response body with their counts and the failed identifiers
+    """
+    for key in list_keys:
+        body[f"{key}Count"] = len(body.pop(key, None) or [])
+    body['failedIds'] = failed_ids
+    return body
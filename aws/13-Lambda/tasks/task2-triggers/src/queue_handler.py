@@ -1,67 +1,268 @@
 import json
-import logging
 import os
 import boto3
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-# Configure logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+from data_aggregation import DatasetAggregator, extract_columns
+from idempotency import COMPLETED, IN_PROGRESS, build_store, record_key
+from lambda_utils import RESPONSE_MODE, compact_body, get_logger, log_payload, start_invocation
+
+# Configure logging (level, sampling and payload size are set in lambda_utils)
+logger = get_logger()
 
 # Initialize AWS clients
 sqs_client = boto3.client('sqs')
 sns_client = boto3.client('sns')
 
+# How successfully processed SQS messages are removed from the queue:
+#   report - return batchItemFailures and let Lambda delete the rest (needs
+#            ReportBatchItemFailures on the event source mapping)
+#   batch  - delete them with DeleteMessageBatch, 10 per call, and fail the
+#            invocation if any record failed so those messages are retried
+SQS_DELETE_MODE = os.environ.get('SQS_DELETE_MODE', 'report')
+SQS_DELETE_BATCH_SIZE = 10
+
+# Records processed in parallel (1 keeps the sequential behaviour). Messages
+# of one FIFO message group always run in order on a single worker.
+QUEUE_WORKERS = int(os.environ.get('QUEUE_WORKERS', '1'))
+# Time (ms) kept before the Lambda deadline; records not started by then are
+# returned as failures so they are retried instead of lost to a timeout
+TIME_RESERVE_MS = int(os.environ.get('TIME_RESERVE_MS', '2000'))
+
+# Skip records that were already processed (see idempotency.py for the tiers)
+IDEMPOTENCY_ENABLED = os.environ.get('IDEMPOTENCY_ENABLED', 'true').lower() == 'true'
+idempotency_store = build_store() if IDEMPOTENCY_ENABLED else None
+
+class BatchProcessingError(Exception):
+    """
+    Raised in batch delete mode so Lambda retries the records that failed
+    """
+    pass
+
 def handler(event, context):
     """
     Lambda handler for SQS/SNS events
     """
-    logger.info(f"Processing queue event: {json.dumps(event)}")
+    start_invocation()
+    log_payload("Processing queue event", event)
     
     try:
         # Process each record in the event
         results = []
         failed_records = []
-        
-        for record in event['Records']:
-            try:
-                result = process_record(record)
+        processed_sqs_records = []
+
+        records = event['Records']
+        for record, result, failure in process_records(records, get_deadline(context)):
+            if failure is not None:
+                failed_records.append(failure)
+            else:
                 results.append(result)
-            except Exception as e:
-                logger.error(f"Error processing record: {str(e)}")
-                failed_records.append({
-                    'recordIdentifier': get_record_identifier(record),
-                    'error': str(e)
-                })
+                if 'Sns' not in record:
+                    processed_sqs_records.append(record)
         
+        aggregates = aggregate_data_results(results)
+
         # Log processing summary
         logger.info(f"Processed {len(results)} records successfully")
         if failed_records:
             logger.error(f"Failed to process {len(failed_records)} records")
+
+        if SQS_DELETE_MODE == 'batch':
+            delete_processed_messages(processed_sqs_records)
+            if failed_records:
+                raise BatchProcessingError(
+                    f"{len(failed_records)} records failed, {len(processed_sqs_records)} already deleted"
+                )
         
+        body = {
+            'message': 'Processing complete',
+            'requestId': context.aws_request_id,
+            'timestamp': datetime.utcnow().isoformat(),
+            'successful': results,
+            'failed': failed_records,
+            'aggregates': aggregates,
+            'idempotency': idempotency_store.stats() if idempotency_store else None
+        }
+        if RESPONSE_MODE == 'compact':
+            body = compact_body(body, ['successful', 'failed'],
+                                [failed['recordIdentifier'] for failed in failed_records])
+
         return {
             'statusCode': 200 if not failed_records else 207,  # 207 Multi-Status
-            'body': {
-                'message': 'Processing complete',
-                'requestId': context.aws_request_id,
-                'timestamp': datetime.utcnow().isoformat(),
-                'successful': results,
-                'failed': failed_records
-            }
+            'body': body,
+            # Read by Lambda when the event source mapping reports batch item failures
+            'batchItemFailures': [
+                {'itemIdentifier': failed['recordIdentifier']} for failed in failed_records
+            ]
         }
-        
+
+    except BatchProcessingError:
+        raise
     except Exception as e:
         logger.error(f"Error processing event: {str(e)}")
         logger.error(traceback.format_exc())
+        if SQS_DELETE_MODE == 'batch':
+            # Without ReportBatchItemFailures any returned value counts as
+            # success and Lambda would delete the whole batch
+            raise
         return {
             'statusCode': 500,
             'body': {
                 'message': 'Error',
                 'error': str(e)
-            }
+            },
+            # Nothing is known to be processed, so every message is retried
+            'batchItemFailures': [
+                {'itemIdentifier': record['messageId']}
+                for record in event.get('Records', []) if 'messageId' in record
+            ]
         }
 
+def get_deadline(context):
+    """
+    time.monotonic() value after which no new record is started, None without a Lambda context
+    """
+    if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return None
+    return time.monotonic() + (context.get_remaining_time_in_millis() - TIME_RESERVE_MS) / 1000
+
+def build_lanes(records):
+    """
+    Split record indexes into lanes that may run concurrently: one lane per
+    FIFO message group, in arrival order, and one lane per other record
+    """
+    lanes = []
+    lanes_by_group = {}
+    for index, record in enumerate(records):
+        group = get_message_group(record)
+        if group is None:
+            lanes.append([index])
+        elif group in lanes_by_group:
+            lanes_by_group[group].append(index)
+        else:
+            lanes_by_group[group] = [index]
+            lanes.append(lanes_by_group[group])
+    return lanes
+
+def process_lane(records, lane, deadline):
+    """
+    Process the records of one lane in order; returns (index, result, failure) tuples
+    """
+    outcomes = []
+    blocked = None
+    for index in lane:
+        record = records[index]
+        identifier = get_record_identifier(record)
+        if blocked is not None:
+            # In a FIFO queue a failed message blocks the rest of its group,
+            # otherwise later messages would be processed out of order
+            outcomes.append((index, None, {'recordIdentifier': identifier, 'error': blocked}))
+            continue
+        if deadline is not None and time.monotonic() >= deadline:
+            outcomes.append((index, None, {
+                'recordIdentifier': identifier,
+                'error': 'Not started before the invocation deadline'
+            }))
+            continue
+
+        key = record_key(record) if idempotency_store else None
+        claim = idempotency_store.claim(key) if key is not None else None
+        if claim == COMPLETED:
+            # Redelivered or retried after it already succeeded
+            outcomes.append((index, {
+                'status': 'duplicate',
+                'source': 'sns' if 'Sns' in record else 'sqs',
+                'messageId': identifier
+            }, None))
+            continue
+        if claim == IN_PROGRESS:
+            # Not known to be processed, so it must stay on the queue for a retry
+            error = 'Claimed by another invocation that has not completed'
+            outcomes.append((index, None, {'recordIdentifier': identifier, 'error': error}))
+            group = get_message_group(record)
+            if group is not None:
+                blocked = f'Skipped after an earlier failure in message group {group}'
+            continue
+
+        try:
+            result = process_record(record)
+        except Exception as e:
+            logger.error(f"Error processing record: {str(e)}")
+            outcomes.append((index, None, {'recordIdentifier': identifier, 'error': str(e)}))
+            if key is not None:
+                idempotency_store.release(key)
+            group = get_message_group(record)
+            if group is not None:
+                blocked = f'Skipped after an earlier failure in message group {group}'
+            continue
+
+        # complete() logs its own errors; a record it could not mark is still processed
+        if key is not None:
+            idempotency_store.complete(key)
+        outcomes.append((index, result, None))
+    return outcomes
+
+def process_records(records, deadline=None):
+    """
+    Process records, QUEUE_WORKERS lanes at a time, and return
+    (record, result, failure) tuples in the original record order
+    """
+    lanes = build_lanes(records)
+    if QUEUE_WORKERS <= 1 or len(lanes) <= 1:
+        lane_outcomes = [process_lane(records, lane, deadline) for lane in lanes]
+    else:
+        with ThreadPoolExecutor(max_workers=min(QUEUE_WORKERS, len(lanes))) as executor:
+            lane_outcomes = list(executor.map(lambda lane: process_lane(records, lane, deadline), lanes))
+
+    outcomes = sorted((outcome for outcomes in lane_outcomes for outcome in outcomes), key=lambda outcome: outcome[0])
+    return [(records[index], result, failure) for index, result, failure in outcomes]
+
+def aggregate_data_results(results):
+    """
+    Summarize the columns of all data messages in the batch per dataset,
+    removing them from the individual results
+    """
+    aggregator = DatasetAggregator()
+    for result in results:
+        message_result = result.get('result')
+        if isinstance(message_result, dict) and 'columns' in message_result:
+            aggregator.add(message_result['dataset'], message_result.pop('columns'),
+                           message_result['record_count'])
+    return aggregator.summaries()
+
+def delete_processed_messages(records):
+    """
+    Delete processed SQS messages with DeleteMessageBatch, grouped by queue
+    """
+    handles_by_queue = {}
+    for record in records:
+        queue_url = get_queue_url_from_arn(record['eventSourceARN'])
+        handles_by_queue.setdefault(queue_url, []).append(record['receiptHandle'])
+
+    deleted = 0
+    for queue_url, handles in handles_by_queue.items():
+        for start in range(0, len(handles), SQS_DELETE_BATCH_SIZE):
+            chunk = handles[start:start + SQS_DELETE_BATCH_SIZE]
+            response = sqs_client.delete_message_batch(
+                QueueUrl=queue_url,
+                Entries=[
+                    {'Id': str(index), 'ReceiptHandle': handle}
+                    for index, handle in enumerate(chunk)
+                ]
+            )
+            deleted += len(response.get('Successful', []))
+            for failure in response.get('Failed', []):
+                # The message becomes visible again and is processed twice
+                logger.warning(f"Could not delete message from {queue_url}: "
+                               f"{failure.get('Code')} {failure.get('Message')}")
+
+    logger.info(f"Deleted {deleted} of {len(records)} processed messages")
+    return deleted
+
 def process_record(record):
     """
     Process individual record from queue
@@ -118,22 +319,15 @@ def process_sqs_record(record):
     Process SQS message record
     """
     message_id = record['messageId']
-    receipt_handle = record['receiptHandle']
     queue_url = get_queue_url_from_arn(record['eventSourceARN'])
     
     try:
         # Parse message body
         body = json.loads(record['body'])
         
-        # Process message
+        # Process message; deleting it is left to Lambda or to the batch delete
         result = process_message_body(body)
         
-        # Delete successfully processed message
-        sqs_client.delete_message(
-            QueueUrl=queue_url,
-            ReceiptHandle=receipt_handle
-        )
-        
         return {
             'status': 'processed',
             'source': 'sqs',
@@ -157,6 +351,14 @@ def process_sqs_record(record):
             }
         }
 
+def process_message_body(body):
+    """
+    Process parsed SQS message body the same way as SNS messages
+    """
+    if isinstance(body, dict) and 'type' in body:
+        return process_typed_message(body)
+    return process_generic_message(body)
+
 def process_typed_message(message):
     """
     Process typed message with specific handling
@@ -214,10 +416,13 @@ def handle_data(message):
     """
     Handle data type message
     """
+    records = message.get('records', [])
     return {
         'type': 'data',
         'dataset': message.get('dataset', 'unknown'),
-        'records': message.get('records', []),
+        'record_count': len(records),
+        # Aggregated over the whole batch by the handler, then dropped
+        'columns': extract_columns(records),
         'processed': True,
         'timestamp': datetime.utcnow().isoformat()
     }
@@ -231,6 +436,14 @@ def get_record_identifier(record):
     else:
         return record['messageId']
 
+def get_message_group(record):
+    """
+    MessageGroupId of a FIFO queue record, None for standard queues and SNS
+    """
+    if 'Sns' in record:
+        return None
+    return record.get('attributes', {}).get('MessageGroupId')
+
 def get_queue_url_from_arn(queue_arn):
     """
     Convert SQS ARN to URL
@@ -1,22 +1,35 @@
-import json
-import logging
+import codecs
 import os
 import boto3
 import traceback
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-# Configure logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+from lambda_utils import RESPONSE_MODE, compact_body, get_logger, log_payload, start_invocation
 
-# Initialize AWS clients
-s3_client = boto3.client('s3')
+# Configure logging (level, sampling and payload size are set in lambda_utils)
+logger = get_logger()
+
+# Text objects are streamed in chunks of this many bytes, so memory use does
+# not depend on the object size
+S3_READ_CHUNK_SIZE = int(os.environ.get('S3_READ_CHUNK_SIZE', str(256 * 1024)))
+# Text objects larger than one range are read with this many concurrent
+# ranged GETs instead of a single stream
+S3_RANGE_SIZE = int(os.environ.get('S3_RANGE_SIZE', str(64 * 1024 * 1024)))
+S3_RANGE_CONCURRENCY = int(os.environ.get('S3_RANGE_CONCURRENCY', '8'))
+# Bytes read past a range end to finish a UTF-8 character that starts in it
+UTF8_MAX_CONTINUATION = 3
+
+# Initialize AWS clients; the pool has a connection for every concurrent range
+s3_client = boto3.client('s3', config=Config(max_pool_connections=max(10, S3_RANGE_CONCURRENCY)))
 
 def handler(event, context):
     """
     Lambda handler for S3 events
     """
-    logger.info(f"Processing S3 event: {json.dumps(event)}")
+    start_invocation()
+    log_payload("Processing S3 event", event)
     
     try:
         # Process each record in the event
@@ -26,14 +39,21 @@ def handler(event, context):
             results.append(result)
             
         logger.info(f"Successfully processed {len(results)} records")
+        body = {
+            'message': 'Success',
+            'requestId': context.aws_request_id,
+            'timestamp': datetime.utcnow().isoformat(),
+            'results': results
+        }
+        if RESPONSE_MODE == 'compact':
+            body = compact_body(body, ['results'], [
+                f"s3://{result['bucket']}/{result['key']}"
+                for result in results if result['status'] == 'error'
+            ])
+
         return {
             'statusCode': 200,
-            'body': {
-                'message': 'Success',
-                'requestId': context.aws_request_id,
-                'timestamp': datetime.utcnow().isoformat(),
-                'results': results
-            }
+            'body': body
         }
         
     except Exception as e:
@@ -97,8 +117,10 @@ def handle_object_created(bucket, key):
     # Process based on content type
     if content_type.startswith('text/'):
         # Process text files
-        content = get_object_content(bucket, key)
-        result = process_text_content(content)
+        if size > S3_RANGE_SIZE:
+            result = count_object_ranges(bucket, key, size, response.get('ETag'))
+        else:
+            result = process_text_content(iter_object_text(bucket, key))
     elif content_type.startswith('image/'):
         # Process image files
         result = {
@@ -136,26 +158,141 @@ def handle_object_removed(bucket, key):
         'timestamp': datetime.utcnow().isoformat()
     }
 
-def get_object_content(bucket, key):
+def iter_object_text(bucket, key, chunk_size=S3_READ_CHUNK_SIZE):
     """
-    Get S3 object content
+    Stream S3 object content as decoded text chunks.
+
+    The incremental decoder holds back a UTF-8 sequence split across two
+    chunks until its remaining bytes arrive.
     """
     response = s3_client.get_object(Bucket=bucket, Key=key)
-    return response['Body'].read().decode('utf-8')
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for chunk in response['Body'].iter_chunks(chunk_size):
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    # Raises on a truncated sequence at the end, like bytes.decode would
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+class TextCounter:
+    """
+    Incremental line, word and character counts of a text fed in chunks
+    """
+
+    def __init__(self):
+        self.newlines = 0
+        self.characters = 0
+        self.words = 0
+        # Whether the text starts or ends inside a word, which a neighbouring
+        # chunk or range may continue
+        self.starts_in_word = False
+        self.ends_in_word = False
+
+    def feed(self, text):
+        if not text:
+            return
+        if not self.characters:
+            self.starts_in_word = not text[0].isspace()
+        words = len(text.split())
+        if self.ends_in_word and not text[0].isspace():
+            words -= 1
+        self.words += words
+        self.newlines += text.count('\n')
+        self.characters += len(text)
+        self.ends_in_word = not text[-1].isspace()
+
+    def merge(self, other):
+        """
+        Append the counts of the text that follows this one
+        """
+        if not other.characters:
+            return
+        if not self.characters:
+            self.starts_in_word = other.starts_in_word
+        self.words += other.words
+        if self.ends_in_word and other.starts_in_word:
+            # One word straddles the boundary
+            self.words -= 1
+        self.newlines += other.newlines
+        self.characters += other.characters
+        self.ends_in_word = other.ends_in_word
+
+    def result(self):
+        # Same numbers as splitting the whole text on '\n': one more line
+        # than newlines, and characters without the newlines
+        return {
+            'type': 'text',
+            'lines': self.newlines + 1,
+            'words': self.words,
+            'characters': self.characters - self.newlines
+        }
 
 def process_text_content(content):
     """
-    Process text file content
+    Process text file content, given as a string or an iterable of text chunks
     """
-    # Add your text processing logic here
-    # For example:
-    lines = content.split('\n')
-    word_count = sum(len(line.split()) for line in lines)
-    char_count = sum(len(line) for line in lines)
-    
-    return {
-        'type': 'text',
-        'lines': len(lines),
-        'words': word_count,
-        'characters': char_count
-    } 
\ No newline at end of file
+    if isinstance(content, str):
+        content = [content]
+
+    counter = TextCounter()
+    for text in content:
+        counter.feed(text)
+    return counter.result() 
+
+def count_range(bucket, key, start, end, size, etag=None):
+    """
+    Count the characters that start within bytes start..end of an object.
+
+    A character cut by the range start belongs to the previous range, so its
+    continuation bytes are skipped; one cut by the range end is finished
+    with up to UTF8_MAX_CONTINUATION bytes read past the end.
+    """
+    last = min(end + UTF8_MAX_CONTINUATION, size - 1)
+    params = {'Bucket': bucket, 'Key': key, 'Range': f"bytes={start}-{last}"}
+    if etag:
+        # Fail instead of mixing ranges of two versions if the object is overwritten
+        params['IfMatch'] = etag
+    response = s3_client.get_object(**params)
+
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    counter = TextCounter()
+    owned = end - start + 1
+    lookahead = b''
+    skip_continuation = start > 0
+    for chunk in response['Body'].iter_chunks(S3_READ_CHUNK_SIZE):
+        if len(chunk) > owned:
+            lookahead += chunk[owned:]
+            chunk = chunk[:owned]
+        owned -= len(chunk)
+        if skip_continuation and chunk:
+            index = 0
+            while index < len(chunk) and (chunk[index] & 0xC0) == 0x80:
+                index += 1
+            chunk = chunk[index:]
+            skip_continuation = not chunk
+        counter.feed(decoder.decode(chunk))
+
+    for index in range(len(lookahead)):
+        if not decoder.getstate()[0]:
+            break
+        counter.feed(decoder.decode(lookahead[index:index + 1]))
+    # Raises if a character is still incomplete, like bytes.decode would
+    counter.feed(decoder.decode(b'', final=True))
+    return counter
+
+def count_object_ranges(bucket, key, size, etag=None):
+    """
+    Count a large text object with S3_RANGE_CONCURRENCY parallel ranged GETs
+    and merge the per-range counts in order
+    """
+    ranges = [(start, min(start + S3_RANGE_SIZE, size) - 1) for start in range(0, size, S3_RANGE_SIZE)]
+    logger.info(f"Reading s3://{bucket}/{key} in {len(ranges)} ranges, {S3_RANGE_CONCURRENCY} at a time")
+
+    with ThreadPoolExecutor(max_workers=min(S3_RANGE_CONCURRENCY, len(ranges))) as executor:
+        counters = executor.map(lambda byte_range: count_range(bucket, key, *byte_range, size, etag), ranges)
+        total = TextCounter()
+        for counter in counters:
+            total.merge(counter)
+    return total.result()
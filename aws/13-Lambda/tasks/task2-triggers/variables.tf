@@ -129,6 +129,18 @@ variable "sqs_batch_size" {
   default     = 10
 }
 
+variable "enable_idempotency_table" {
+  description = "Create a DynamoDB table that deduplicates queue records across Lambda containers"
+  type        = bool
+  default     = false
+}
+
+variable "idempotency_ttl_seconds" {
+  description = "How long processed queue records are remembered"
+  type        = number
+  default     = 3600
+}
+
 variable "enable_dlq" {
   description = "Enable Dead Letter Queue"
   type        = bool
@@ -0,0 +1,296 @@
+"""
+Throughput, latency and memory of DynamoDBOperations and lambda_handler.
+
+Runs get, put, update, query, scan, batch_write and a handler read against
+DynamoDB Local (--endpoint-url) or an in-process moto stand-in (--moto), for
+every item size in --item-sizes, and reports per operation:
+
+  * ops_per_sec and p50/p95/p99 latency from a timed pass
+  * peak_traced_kb and retained_bytes_per_op from a separate, shorter
+    tracemalloc pass (tracing slows calls down, so it is not timed)
+  * peak_rss_kb, the process high-water mark after the operation ran
+
+Results are written as JSON with --output. With --baseline, a previous
+result file is compared and the run fails when an operation got slower than
+--max-regression percent, so it can gate a deploy.
+
+moto does not model the network, so absolute numbers only mean something
+against a real endpoint; moto runs are still useful to catch CPU and
+allocation regressions in our own code.
+
+Usage:
+    python benchmarks/crud_suite.py --moto --items 2000 --item-sizes 256,4096 --output bench.json
+    python benchmarks/crud_suite.py --endpoint-url http://localhost:8000 --baseline bench.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+OPERATIONS = ['get', 'put', 'update', 'query', 'scan', 'batch_write', 'handler_read']
+# Scans read the whole table, so they run this many times fewer iterations
+SCAN_ITERATION_DIVISOR = 50
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--table', default='BenchmarkSuite', help='Table name prefix, one table per item size')
+    parser.add_argument('--items', type=int, default=2000, help='Items seeded per table')
+    parser.add_argument('--item-sizes', default='256,4096', help='Comma separated item sizes in bytes')
+    parser.add_argument('--groups', type=int, default=20, help='Partitions the items are spread over')
+    parser.add_argument('--iterations', type=int, default=500, help='Timed calls per operation')
+    parser.add_argument('--alloc-iterations', type=int, default=50, help='Calls per operation traced by tracemalloc')
+    parser.add_argument('--batch-size', type=int, default=25, help='Items per batch_write call')
+    parser.add_argument('--segments', type=int, default=4, help='Parallel scan segments')
+    parser.add_argument('--operations', default=','.join(OPERATIONS), help='Comma separated subset to run')
+    parser.add_argument('--fast-path', action='store_true', help='Use the low-level client fast path')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare with a previous JSON result')
+    parser.add_argument('--max-regression', type=float, default=20.0,
+                        help='Allowed ops/sec drop versus the baseline, in percent')
+    parser.add_argument('--endpoint-url', help='DynamoDB endpoint, e.g. DynamoDB Local')
+    parser.add_argument('--moto', action='store_true', help='Use an in-process moto stand-in')
+    return parser.parse_args()
+
+
+def setup_environment(args):
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    if args.endpoint_url:
+        os.environ['DYNAMODB_ENDPOINT_URL'] = args.endpoint_url
+    if args.moto or args.endpoint_url:
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+    if args.moto:
+        from moto import mock_aws
+        mock = mock_aws()
+        mock.start()
+        return mock
+    return None
+
+
+def make_item(index, groups, size):
+    """
+    Item of about `size` bytes; the padding makes up what the other attributes leave
+    """
+    item = {
+        'TenantId': f'tenant-{index % groups}',
+        'UserId': f'user-{index:08d}',
+        'Name': f'User {index}',
+        'Score': index
+    }
+    used = sum(len(name) + len(str(value)) for name, value in item.items())
+    item['Payload'] = 'x' * max(0, size - used - len('Payload'))
+    return item
+
+
+def ensure_table(ops, client, table_name, args, size):
+    if table_name not in client.list_tables()['TableNames']:
+        client.create_table(
+            TableName=table_name,
+            KeySchema=[
+                {'AttributeName': 'TenantId', 'KeyType': 'HASH'},
+                {'AttributeName': 'UserId', 'KeyType': 'RANGE'}
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'TenantId', 'AttributeType': 'S'},
+                {'AttributeName': 'UserId', 'AttributeType': 'S'}
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        client.get_waiter('table_exists').wait(TableName=table_name)
+    result = ops.bulk_write(make_item(i, args.groups, size) for i in range(args.items))
+    if not result['success']:
+        raise SystemExit(f"Seeding {table_name} failed: {result['message']}")
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, max(0, int(round(p / 100 * len(samples))) - 1))]
+
+
+def timed(fn, iterations):
+    samples = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    return {
+        'iterations': iterations,
+        'ops_per_sec': round(iterations / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'max_ms': round(samples[-1] * 1000, 3)
+    }
+
+
+def traced(fn, iterations, offset):
+    """
+    Peak and retained Python allocations over `iterations` calls
+    """
+    tracemalloc.start()
+    try:
+        fn(offset)  # warm caches so one-off allocations do not count as retained
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for i in range(iterations):
+            fn(offset + i + 1)
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'peak_traced_kb': round((peak - before) / 1024, 1),
+        'retained_bytes_per_op': round((after - before) / iterations, 1)
+    }
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def build_operations(crud_operations, ops, args, size):
+    """
+    One callable per operation; each takes the iteration number so keys vary
+    """
+    groups = args.groups
+    items = args.items
+    devnull = open(os.devnull, 'w')
+
+    def key(i):
+        index = (i * 7919) % items
+        return {'TenantId': f'tenant-{index % groups}', 'UserId': f'user-{index:08d}'}
+
+    def handler_read(i):
+        # EMF metric lines go to stdout and would drown the report
+        with contextlib.redirect_stdout(devnull):
+            crud_operations.lambda_handler({'operation': 'read', 'payload': key(i)}, None)
+
+    def check(result):
+        if not result['success']:
+            raise RuntimeError(result['message'])
+
+    operations = {
+        'get': lambda i: check(ops.get_item(key(i))),
+        'put': lambda i: check(ops.create_item(make_item(items + i, groups, size))),
+        'update': lambda i: check(ops.update_item(key(i), {'Score': i}, add={'Version': 1})),
+        'query': lambda i: check(ops.query_items('TenantId = :t', {':t': f'tenant-{i % groups}'})),
+        'scan': lambda i: check(ops.filtered_scan(segments=args.segments)),
+        'batch_write': lambda i: check(ops.batch_write_items(
+            [make_item(items + i * args.batch_size + n, groups, size) for n in range(args.batch_size)]
+        )),
+        'handler_read': handler_read
+    }
+    return operations
+
+
+def run_suite(crud_operations, args):
+    results = []
+    selected = [name for name in args.operations.split(',') if name]
+    for size in [int(size) for size in args.item_sizes.split(',') if size]:
+        table_name = f"{args.table}-{size}"
+        ops = crud_operations.DynamoDBOperations(table_name, fast_path=args.fast_path,
+                                                 number_mode='int' if args.fast_path else 'decimal')
+        # lambda_handler picks up the same instance through get_operations
+        os.environ['TABLE_NAME'] = table_name
+        crud_operations._operations[table_name] = ops
+        ensure_table(ops, ops.client if args.fast_path else crud_operations.dynamodb.meta.client,
+                     table_name, args, size)
+        operations = build_operations(crud_operations, ops, args, size)
+
+        for name in selected:
+            fn = operations[name]
+            iterations = args.iterations
+            alloc_iterations = args.alloc_iterations
+            if name == 'scan':
+                iterations = max(1, iterations // SCAN_ITERATION_DIVISOR)
+                alloc_iterations = max(1, alloc_iterations // SCAN_ITERATION_DIVISOR)
+            result = {'operation': name, 'item_size': size}
+            result.update(timed(fn, iterations))
+            result.update(traced(fn, alloc_iterations, iterations))
+            result['peak_rss_kb'] = peak_rss_kb()
+            if name == 'batch_write' and result['ops_per_sec']:
+                result['items_per_sec'] = round(result['ops_per_sec'] * args.batch_size, 1)
+            results.append(result)
+            print(f"{name:<13} {size:>6}B  {result['ops_per_sec']:>9.1f} ops/s  "
+                  f"p50 {result['p50_ms']:>8.3f}  p95 {result['p95_ms']:>8.3f}  p99 {result['p99_ms']:>8.3f} ms  "
+                  f"peak {result['peak_traced_kb']:>8.1f} KB  retained {result['retained_bytes_per_op']:>8.1f} B/op")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, max_regression):
+    """
+    Print operations slower than the baseline; returns how many regressed
+    """
+    with open(baseline_path) as f:
+        baseline = {(r['operation'], r['item_size']): r for r in json.load(f)['results']}
+
+    regressions = 0
+    for result in results:
+        previous = baseline.get((result['operation'], result['item_size']))
+        if not previous or not previous.get('ops_per_sec') or not result['ops_per_sec']:
+            continue
+        change = 100 * (result['ops_per_sec'] - previous['ops_per_sec']) / previous['ops_per_sec']
+        marker = ''
+        if change < -max_regression:
+            regressions += 1
+            marker = '  REGRESSION'
+        print(f"{result['operation']:<13} {result['item_size']:>6}B  "
+              f"{previous['ops_per_sec']:>9.1f} -> {result['ops_per_sec']:>9.1f} ops/s ({change:+.1f}%){marker}")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    mock = setup_environment(args)
+    sys.path.insert(0, SRC_DIR)
+    import crud_operations
+
+    started = datetime.now(timezone.utc)
+    results = run_suite(crud_operations, args)
+    report = {
+        'started_at': started.isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'target': 'moto' if args.moto else args.endpoint_url or 'aws',
+        'config': {name: value for name, value in vars(args).items() if name not in ('output', 'baseline')},
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    regressions = 0
+    if args.baseline:
+        print(f"\nCompared with {args.baseline}")
+        regressions = compare(results, args.baseline, args.max_regression)
+
+    if mock:
+        mock.stop()
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Items/sec decoded by the boto3 resource path versus the fast path decoder.
+
+The resource layer converts every low-level item with TypeDeserializer and
+builds a Decimal for each number. The fast path uses
+attribute_values.make_item_decoder. Both are fed the same synthetic
+query-sized pages, so no AWS access is needed.
+
+Usage:
+    python benchmarks/decode_throughput.py --items 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--items', type=int, default=20000, help='Items decoded per run')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--numbers', type=int, default=10, help='Numeric attributes per item')
+    return parser.parse_args()
+
+
+def make_item(index, numbers):
+    """
+    Low-level item resembling a user record with nested and numeric attributes
+    """
+    item = {
+        'UserId': {'S': f'user-{index}'},
+        'Name': {'S': f'User {index}'},
+        'Active': {'BOOL': index % 2 == 0},
+        'Address': {'M': {
+            'City': {'S': 'Minsk'},
+            'Zip': {'N': str(220000 + index % 1000)}
+        }},
+        'Tags': {'L': [{'S': 'a'}, {'S': 'b'}, {'N': '3'}]}
+    }
+    for n in range(numbers):
+        item[f'Metric{n}'] = {'N': str(index * n + 0.25 * n)}
+    return item
+
+
+def throughput(decode, items, runs):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        for item in items:
+            decode(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(items) / best
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, SRC_DIR)
+    from attribute_values import make_item_decoder
+    from boto3.dynamodb.types import TypeDeserializer
+
+    items = [make_item(i, args.numbers) for i in range(args.items)]
+    deserializer = TypeDeserializer()
+
+    def resource_decode(item):
+        return {name: deserializer.deserialize(value) for name, value in item.items()}
+
+    baseline = throughput(resource_decode, items, args.runs)
+    print(f"Decoding {args.items} items, best of {args.runs} runs")
+    print(f"{'resource (TypeDeserializer)':<30} {baseline:>12,.0f} items/s")
+    for mode in ('decimal', 'float', 'int'):
+        rate = throughput(make_item_decoder(mode), items, args.runs)
+        print(f"{'fast path (' + mode + ')':<30} {rate:>12,.0f} items/s  x{rate / baseline:.2f}")
+
+
+if __name__ == '__main__':
+    main()
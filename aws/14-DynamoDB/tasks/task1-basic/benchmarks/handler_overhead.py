@@ -0,0 +1,123 @@
+"""
+Per-invocation overhead of lambda_handler before and after warm-container reuse.
+
+Runs against DynamoDB Local (--endpoint-url) or an in-process moto stand-in
+(--moto) and compares:
+
+  * cold_ops  - a new DynamoDBOperations on every invocation (old behaviour)
+  * warm_ops  - the instance cached by get_operations()
+  * default_config / tuned_config - a parallel scan through a resource using
+    botocore defaults versus build_client_config()
+
+moto does not model the network, so connection pooling and keepalive only
+show up against a real endpoint.
+
+Usage:
+    python benchmarks/handler_overhead.py --moto --iterations 500
+    python benchmarks/handler_overhead.py --endpoint-url http://localhost:8000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--table', default=os.environ.get('TABLE_NAME', 'BenchmarkUsers'))
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--items', type=int, default=2000, help='Items seeded for the scan comparison')
+    parser.add_argument('--segments', type=int, default=16, help='Parallel scan segments')
+    parser.add_argument('--endpoint-url', help='DynamoDB endpoint, e.g. DynamoDB Local')
+    parser.add_argument('--moto', action='store_true', help='Use an in-process moto stand-in')
+    return parser.parse_args()
+
+
+def setup_environment(args):
+    os.environ['TABLE_NAME'] = args.table
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    if args.endpoint_url:
+        os.environ['DYNAMODB_ENDPOINT_URL'] = args.endpoint_url
+    if args.moto or args.endpoint_url:
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+    if args.moto:
+        from moto import mock_aws
+        mock = mock_aws()
+        mock.start()
+        return mock
+    return None
+
+
+def ensure_table(resource, table_name, items):
+    client = resource.meta.client
+    if table_name not in client.list_tables()['TableNames']:
+        client.create_table(
+            TableName=table_name,
+            KeySchema=[{'AttributeName': 'UserId', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'UserId', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        client.get_waiter('table_exists').wait(TableName=table_name)
+    with resource.Table(table_name).batch_writer() as batch:
+        for i in range(items):
+            batch.put_item(Item={'UserId': f'user-{i}', 'Name': f'User {i}', 'Score': i})
+
+
+def measure(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        'mean_us': statistics.mean(samples) * 1e6,
+        'p50_us': samples[len(samples) // 2] * 1e6,
+        'p95_us': samples[int(len(samples) * 0.95) - 1] * 1e6
+    }
+
+
+def report(name, result):
+    print(f"{name:<16} mean {result['mean_us']:>10.1f} us  "
+          f"p50 {result['p50_us']:>10.1f} us  p95 {result['p95_us']:>10.1f} us")
+
+
+def main():
+    args = parse_args()
+    mock = setup_environment(args)
+    sys.path.insert(0, SRC_DIR)
+    import crud_operations
+    from botocore.config import Config
+
+    ensure_table(crud_operations.dynamodb, args.table, args.items)
+    event = {'operation': 'read', 'payload': {'UserId': 'user-1'}}
+
+    def cold_invocation():
+        crud_operations._operations.clear()
+        crud_operations.lambda_handler(event, None)
+
+    def warm_invocation():
+        crud_operations.lambda_handler(event, None)
+
+    print(f"Handler overhead ({args.iterations} invocations)")
+    report('cold_ops', measure(cold_invocation, args.iterations))
+    report('warm_ops', measure(warm_invocation, args.iterations))
+
+    scan_runs = max(1, args.iterations // 100)
+    default_ops = crud_operations.DynamoDBOperations(args.table, config=Config())
+    tuned_ops = crud_operations.DynamoDBOperations(args.table, config=crud_operations.build_client_config())
+
+    print(f"\nParallel scan, {args.segments} segments ({scan_runs} runs)")
+    report('default_config', measure(lambda: sum(1 for _ in default_ops.iter_scan(segments=args.segments)), scan_runs))
+    report('tuned_config', measure(lambda: sum(1 for _ in tuned_ops.iter_scan(segments=args.segments)), scan_runs))
+
+    if mock:
+        mock.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,20 @@ provider "aws" {
   region = var.aws_region
 }
 
+locals {
+  # Attribute definitions needed by the GSI keys (UserId is declared on the table)
+  gsi_key_attributes = flatten([
+    for index in var.global_secondary_indexes : concat(
+      [{ name = index.hash_key, type = index.hash_key_type }],
+      index.range_key != null ? [{ name = index.range_key, type = index.range_key_type }] : []
+    )
+  ])
+  gsi_attributes = {
+    for name, types in { for attr in local.gsi_key_attributes : attr.name => attr.type... } :
+    name => types[0] if name != "UserId"
+  }
+}
+
 # DynamoDB Table
 resource "aws_dynamodb_table" "main" {
   name           = "${var.project_name}-${var.environment}-${var.table_name}"
@@ -19,6 +33,31 @@ resource "aws_dynamodb_table" "main" {
     type = "S"
   }
 
+  # Key attributes of the global secondary indexes
+  dynamic "attribute" {
+    for_each = local.gsi_attributes
+    content {
+      name = attribute.key
+      type = attribute.value
+    }
+  }
+
+  dynamic "global_secondary_index" {
+    for_each = var.global_secondary_indexes
+    content {
+      name            = global_secondary_index.value.name
+      hash_key        = global_secondary_index.value.hash_key
+      range_key       = global_secondary_index.value.range_key
+      projection_type = global_secondary_index.value.projection_type
+      read_capacity   = var.billing_mode == "PROVISIONED" ? var.read_capacity : null
+      write_capacity  = var.billing_mode == "PROVISIONED" ? var.write_capacity : null
+    }
+  }
+
+  # Stream feeding the aggregate consumer
+  stream_enabled   = var.enable_stream_aggregates
+  stream_view_type = var.enable_stream_aggregates ? "NEW_AND_OLD_IMAGES" : null
+
   # Enable point-in-time recovery
   point_in_time_recovery {
     enabled = var.enable_point_in_time_recovery
@@ -174,6 +213,9 @@ resource "aws_lambda_function" "dynamodb_trigger" {
     variables = {
       TABLE_NAME = aws_dynamodb_table.main.name
       ENVIRONMENT = var.environment
+      BACKGROUND_CAPACITY_FRACTION = var.background_capacity_fraction
+      METRICS_ENABLED = var.enable_operation_metrics
+      METRICS_NAMESPACE = var.metrics_namespace
     }
   }
 
@@ -181,4 +223,40 @@ resource "aws_lambda_function" "dynamodb_trigger" {
     Name        = "${var.project_name}-lambda"
     Environment = var.environment
   })
-} 
\ No newline at end of file
+} 
+
+# Streams consumer maintaining aggregate items (if enabled)
+resource "aws_lambda_function" "stream_aggregator" {
+  count = var.enable_lambda_trigger && var.enable_stream_aggregates ? 1 : 0
+
+  filename         = "${path.module}/src/lambda_function.zip"
+  function_name    = "${var.project_name}-${var.environment}-stream-aggregator"
+  role            = aws_iam_role.lambda_role[0].arn
+  handler         = "stream_aggregator.lambda_handler"
+  runtime         = "python3.9"
+  timeout         = 60
+
+  environment {
+    variables = {
+      TABLE_NAME               = aws_dynamodb_table.main.name
+      AGGREGATE_GROUP_BY       = var.aggregate_group_by
+      AGGREGATE_SUM_ATTRIBUTES = var.aggregate_sum_attributes
+    }
+  }
+
+  tags = merge(var.tags, {
+    Name        = "${var.project_name}-stream-aggregator"
+    Environment = var.environment
+  })
+}
+
+resource "aws_lambda_event_source_mapping" "stream_aggregator" {
+  count = var.enable_lambda_trigger && var.enable_stream_aggregates ? 1 : 0
+
+  event_source_arn        = aws_dynamodb_table.main.stream_arn
+  function_name           = aws_lambda_function.stream_aggregator[0].arn
+  starting_position       = "TRIM_HORIZON"
+  batch_size              = 500
+  maximum_retry_attempts  = 10
+  function_response_types = ["ReportBatchItemFailures"]
+}
@@ -0,0 +1,470 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from attribute_values import encode_item, make_item_decoder
+from bulk_writer import BATCH_WRITE_SIZE, THROTTLE_ERRORS
+from dynamodb_common import (
+    BATCH_GET_CHUNK_SIZE,
+    BATCH_MAX_RETRIES,
+    DEFAULT_SCAN_SEGMENTS,
+    DYNAMODB_ENDPOINT_URL,
+    backoff_delay,
+    build_client_config,
+    key_fingerprint,
+    projection_params,
+    update_params
+)
+
+try:
+    from aiobotocore.session import get_session
+except ImportError:
+    get_session = None
+
+logger = logging.getLogger()
+
+# In-flight DynamoDB requests per AsyncDynamoDBOperations, which is also the
+# size of its connection pool
+DEFAULT_MAX_CONCURRENCY = 64
+
+
+class AsyncDynamoDBOperations:
+    """
+    asyncio counterpart of DynamoDBOperations on top of aiobotocore.
+
+    One instance owns one async client, so every coroutine using it shares a
+    single connection pool; a semaphore caps the requests in flight at
+    max_concurrency. Create it once per process (e.g. at app startup) and use
+    it as an async context manager:
+
+        async with AsyncDynamoDBOperations('Users') as db:
+            results = await asyncio.gather(*(db.get_item({'UserId': uid}) for uid in ids))
+
+    Items are converted with attribute_values, so number_mode picks 'decimal',
+    'float' or 'int' numbers like the sync fast path. Point
+    DYNAMODB_ENDPOINT_URL (or endpoint_url) at DynamoDB Local or a moto
+    server to run against a local stand-in.
+    """
+
+    def __init__(self, table_name: str, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 config: Optional[Config] = None, number_mode: str = 'decimal',
+                 endpoint_url: Optional[str] = None, key_names: Optional[List[str]] = None):
+        if get_session is None:
+            raise ImportError("AsyncDynamoDBOperations needs the 'aiobotocore' package: pip install aiobotocore")
+        self.table_name = table_name
+        self.max_concurrency = max_concurrency
+        self.config = config or build_client_config(max_pool_connections=max_concurrency)
+        self.endpoint_url = endpoint_url or DYNAMODB_ENDPOINT_URL
+        self.client = None
+        self._key_names = key_names
+        self._decode_item = make_item_decoder(number_mode)
+        # Keys keep exact Decimal numbers so cursors round-trip losslessly
+        self._decode_key = make_item_decoder('decimal')
+        # Created in open(): before Python 3.10 a Semaphore binds to the event
+        # loop current at construction, which may not be the one running later
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._exit_stack: Optional[AsyncExitStack] = None
+
+    async def __aenter__(self) -> 'AsyncDynamoDBOperations':
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        """
+        Create the async client and its connection pool
+        """
+        if self.client is not None:
+            return
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._exit_stack = AsyncExitStack()
+        self.client = await self._exit_stack.enter_async_context(
+            get_session().create_client('dynamodb', config=self.config, endpoint_url=self.endpoint_url)
+        )
+
+    async def close(self) -> None:
+        """
+        Close the client and release its connections
+        """
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+        self._exit_stack = None
+        self.client = None
+        self._semaphore = None
+
+    async def _call(self, operation: str, **params: Any) -> Dict[str, Any]:
+        """
+        Run one client call while holding a concurrency slot
+        """
+        async with self._semaphore:
+            return await getattr(self.client, operation)(**params)
+
+    def _decode_items(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self._decode_item(item) for item in items]
+
+    async def key_names(self) -> List[str]:
+        """
+        Primary key attribute names, loaded once from DescribeTable
+        """
+        if self._key_names is None:
+            description = await self._call('describe_table', TableName=self.table_name)
+            self._key_names = [key['AttributeName'] for key in description['Table']['KeySchema']]
+        return self._key_names
+
+    async def create_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create a new item in the table
+        """
+        try:
+            await self._call('put_item', TableName=self.table_name, Item=encode_item(item))
+            return {
+                'success': True,
+                'message': 'Item created successfully',
+                'data': item
+            }
+        except ClientError as e:
+            logger.error(f"Error creating item: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': e.response['Error']['Code']
+            }
+
+    async def get_item(self, key: Dict[str, Any], attributes: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Retrieve an item from the table, optionally only the listed attributes
+        """
+        try:
+            response = await self._call('get_item', TableName=self.table_name, Key=encode_item(key),
+                                        **projection_params(attributes))
+            item = response.get('Item')
+            if not item:
+                return {
+                    'success': False,
+                    'message': 'Item not found',
+                    'error': 'NotFound'
+                }
+            return {
+                'success': True,
+                'message': 'Item retrieved successfully',
+                'data': self._decode_item(item)
+            }
+        except ClientError as e:
+            logger.error(f"Error retrieving item: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': e.response['Error']['Code']
+            }
+
+    async def update_item(self, key: Dict[str, Any], updates: Optional[Dict[str, Any]] = None,
+                          remove: Optional[List[str]] = None,
+                          add: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Update an existing item: SET `updates`, REMOVE `remove` and ADD `add`
+        """
+        try:
+            params = update_params(updates, remove, add)
+            if 'ExpressionAttributeValues' in params:
+                params['ExpressionAttributeValues'] = encode_item(params['ExpressionAttributeValues'])
+            response = await self._call('update_item', TableName=self.table_name, Key=encode_item(key),
+                                        ReturnValues='ALL_NEW', **params)
+            return {
+                'success': True,
+                'message': 'Item updated successfully',
+                'data': self._decode_item(response.get('Attributes', {}))
+            }
+        except ClientError as e:
+            logger.error(f"Error updating item: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': e.response['Error']['Code']
+            }
+
+    async def delete_item(self, key: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Delete an item from the table
+        """
+        try:
+            await self._call('delete_item', TableName=self.table_name, Key=encode_item(key))
+            return {
+                'success': True,
+                'message': 'Item deleted successfully'
+            }
+        except ClientError as e:
+            logger.error(f"Error deleting item: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': e.response['Error']['Code']
+            }
+
+    async def iter_query(self, key_condition: str, values: Dict[str, Any],
+                         page_size: Optional[int] = None,
+                         scan_forward: bool = True,
+                         attributes: Optional[List[str]] = None,
+                         index_name: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream query results, fetching the next page only when it is needed
+        """
+        request = {
+            'TableName': self.table_name,
+            'KeyConditionExpression': key_condition,
+            'ExpressionAttributeValues': encode_item(values),
+            'ScanIndexForward': scan_forward,
+            **projection_params(attributes)
+        }
+        if page_size:
+            request['Limit'] = page_size
+        if index_name:
+            request['IndexName'] = index_name
+
+        while True:
+            response = await self._call('query', **request)
+            for item in self._decode_items(response.get('Items', [])):
+                yield item
+            if 'LastEvaluatedKey' not in response:
+                return
+            request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    async def query_items(self, key_condition: str, values: Dict[str, Any],
+                          attributes: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Query items using key condition, following every page
+        """
+        try:
+            items = [item async for item in self.iter_query(key_condition, values, attributes=attributes)]
+            return {
+                'success': True,
+                'message': 'Query executed successfully',
+                'data': items,
+                'count': len(items)
+            }
+        except ClientError as e:
+            logger.error(f"Error querying items: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': e.response['Error']['Code']
+            }
+
+    async def iter_scan(self, filter_expression: Optional[str] = None,
+                        values: Optional[Dict[str, Any]] = None,
+                        segments: int = DEFAULT_SCAN_SEGMENTS,
+                        page_size: Optional[int] = None,
+                        attributes: Optional[List[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a parallel scan: one task per segment feeds a bounded page queue
+        """
+        request = {'TableName': self.table_name, **projection_params(attributes)}
+        if filter_expression:
+            request['FilterExpression'] = filter_expression
+        if values:
+            request['ExpressionAttributeValues'] = encode_item(values)
+        if page_size:
+            request['Limit'] = page_size
+
+        pages: asyncio.Queue = asyncio.Queue(maxsize=segments * 2)
+        done = object()
+
+        async def scan_segment(segment: int) -> None:
+            segment_request = dict(request)
+            if segments > 1:
+                segment_request['Segment'] = segment
+                segment_request['TotalSegments'] = segments
+            try:
+                while True:
+                    response = await self._call('scan', **segment_request)
+                    await pages.put(response.get('Items', []))
+                    if 'LastEvaluatedKey' not in response:
+                        break
+                    segment_request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+                await pages.put(done)
+            except Exception as e:
+                await pages.put(e)
+
+        tasks = [asyncio.create_task(scan_segment(segment)) for segment in range(segments)]
+        try:
+            remaining = segments
+            while remaining:
+                page = await pages.get()
+                if page is done:
+                    remaining -= 1
+                    continue
+                if isinstance(page, Exception):
+                    raise page
+                for item in self._decode_items(page):
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def scan_table(self, filter_expression: Optional[str] = None,
+                         values: Optional[Dict[str, Any]] = None,
+                         segments: int = 1,
+                         attributes: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Scan the entire table with optional filter, following every page
+        """
+        try:
+            items = [item async for item in self.iter_scan(filter_expression, values, segments,
+                                                           attributes=attributes)]
+            return {
+                'success': True,
+                'message': 'Scan executed successfully',
+                'data': items,
+                'count': len(items)
+            }
+        except ClientError as e:
+            logger.error(f"Error scanning table: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': e.response['Error']['Code']
+            }
+
+    async def batch_get_items(self, keys: List[Dict[str, Any]],
+                              consistent_read: bool = False) -> Dict[str, Any]:
+        """
+        Retrieve many items by key; chunks of 100 are fetched concurrently.
+        'data' lines up with the input keys and holds None for missing items.
+        """
+        try:
+            if not keys:
+                return {
+                    'success': True,
+                    'message': 'No keys requested',
+                    'data': [],
+                    'count': 0,
+                    'missing': []
+                }
+            key_names = tuple(sorted(keys[0]))
+            unique_keys = list({key_fingerprint(key, key_names): key for key in keys}.values())
+            chunks = [
+                unique_keys[i:i + BATCH_GET_CHUNK_SIZE]
+                for i in range(0, len(unique_keys), BATCH_GET_CHUNK_SIZE)
+            ]
+            results = await asyncio.gather(*(self._batch_get_chunk(chunk, consistent_read) for chunk in chunks))
+
+            found = {}
+            unprocessed = []
+            for items, leftover in results:
+                for item in items:
+                    found[key_fingerprint(item, key_names)] = item
+                unprocessed.extend(leftover)
+            unprocessed_ids = {key_fingerprint(key, key_names) for key in unprocessed}
+
+            data = [found.get(key_fingerprint(key, key_names)) for key in keys]
+            response = {
+                'success': not unprocessed,
+                'message': 'Batch read executed successfully',
+                'data': data,
+                'count': len(data) - data.count(None),
+                'missing': [
+                    key for key, item in zip(keys, data)
+                    if item is None and key_fingerprint(key, key_names) not in unprocessed_ids
+                ]
+            }
+            if unprocessed:
+                response['message'] = 'Some keys could not be read, retry them later'
+                response['error'] = 'UnprocessedKeys'
+                response['unprocessed'] = unprocessed
+            return response
+        except ClientError as e:
+            logger.error(f"Error in batch read: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': e.response['Error']['Code']
+            }
+
+    async def _batch_get_chunk(self, keys: List[Dict[str, Any]], consistent_read: bool
+                               ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Fetch up to 100 keys, retrying UnprocessedKeys with jittered backoff
+        """
+        request = {
+            self.table_name: {
+                'Keys': [encode_item(key) for key in keys],
+                'ConsistentRead': consistent_read
+            }
+        }
+        items = []
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(backoff_delay(attempt))
+            response = await self._call('batch_get_item', RequestItems=request)
+            items.extend(self._decode_items(response.get('Responses', {}).get(self.table_name, [])))
+            request = response.get('UnprocessedKeys') or {}
+            if not request:
+                return items, []
+        return items, [self._decode_key(key) for key in request[self.table_name]['Keys']]
+
+    async def batch_write_items(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Write many items with concurrent BatchWriteItem calls of 25.
+        Items sharing a primary key are collapsed so the last one wins.
+        """
+        try:
+            key_names = tuple(await self.key_names())
+            unique_items = list({key_fingerprint(item, key_names): item for item in items}.values())
+            batches = [
+                unique_items[i:i + BATCH_WRITE_SIZE]
+                for i in range(0, len(unique_items), BATCH_WRITE_SIZE)
+            ]
+            failed = await asyncio.gather(*(self._write_batch(batch) for batch in batches))
+        except ClientError as e:
+            logger.error(f"Error in batch write: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': e.response['Error']['Code']
+            }
+
+        failed_keys = [key for batch_failed in failed for key in batch_failed]
+        written = len(unique_items) - len(failed_keys)
+        if failed_keys:
+            logger.error(f"Failed to write {len(failed_keys)} items to table {self.table_name}")
+            return {
+                'success': False,
+                'message': f"Wrote {written} items, {len(failed_keys)} failed",
+                'error': 'UnprocessedItems',
+                'count': written,
+                'failed_keys': failed_keys
+            }
+        return {
+            'success': True,
+            'message': 'Batch write executed successfully',
+            'count': written
+        }
+
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Send one batch of up to 25 puts, retrying throttles and UnprocessedItems.
+        Returns the keys that could not be written.
+        """
+        requests = [{'PutRequest': {'Item': encode_item(item)}} for item in batch]
+        key_names = await self.key_names()
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(backoff_delay(attempt))
+            try:
+                response = await self._call('batch_write_item', RequestItems={self.table_name: requests})
+            except ClientError as e:
+                if e.response['Error']['Code'] in THROTTLE_ERRORS:
+                    continue
+                raise
+            requests = response.get('UnprocessedItems', {}).get(self.table_name, [])
+            if not requests:
+                return []
+        return [
+            self._decode_key({name: request['PutRequest']['Item'][name] for name in key_names})
+            for request in requests
+        ]
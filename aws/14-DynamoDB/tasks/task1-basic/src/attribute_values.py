@@ -0,0 +1,93 @@
+from decimal import Decimal
+from typing import Any, Callable, Dict
+
+
+def _int_or_float(value: str) -> Any:
+    """
+    Parse a DynamoDB number as int when it is integral, float otherwise
+    """
+    # A character check is much cheaper than catching int()'s ValueError
+    if '.' in value or 'e' in value or 'E' in value:
+        return float(value)
+    return int(value)
+
+
+NUMBER_PARSERS: Dict[str, Callable[[str], Any]] = {
+    'decimal': Decimal,
+    'float': float,
+    'int': _int_or_float
+}
+
+
+def make_item_decoder(number_mode: str = 'decimal') -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Build a function converting a low-level DynamoDB item to native Python types.
+
+    This does the same job as boto3's TypeDeserializer without the per-value
+    method dispatch, and lets numbers come back as int/float instead of Decimal
+    so responses can go straight to json.dumps.
+    """
+    if number_mode not in NUMBER_PARSERS:
+        raise ValueError(f"Unsupported number mode: {number_mode}. Must be one of: {list(NUMBER_PARSERS)}")
+    parse_number = NUMBER_PARSERS[number_mode]
+
+    def decode_value(attribute: Dict[str, Any]) -> Any:
+        for tag, value in attribute.items():
+            if tag == 'S':
+                return value
+            if tag == 'N':
+                return parse_number(value)
+            if tag == 'M':
+                return {name: decode_value(nested) for name, nested in value.items()}
+            if tag == 'L':
+                return [decode_value(nested) for nested in value]
+            if tag == 'BOOL' or tag == 'B':
+                return value
+            if tag == 'NULL':
+                return None
+            if tag == 'SS' or tag == 'BS':
+                return set(value)
+            if tag == 'NS':
+                return {parse_number(number) for number in value}
+            raise TypeError(f"Unknown DynamoDB type: {tag}")
+
+    def decode_item(item: Dict[str, Any]) -> Dict[str, Any]:
+        return {name: decode_value(attribute) for name, attribute in item.items()}
+
+    return decode_item
+
+
+def encode_value(value: Any) -> Dict[str, Any]:
+    """
+    Convert a native Python value to a low-level DynamoDB attribute value
+    """
+    if isinstance(value, str):
+        return {'S': value}
+    # bool is checked before int because it is a subclass of int
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if isinstance(value, (int, float, Decimal)):
+        return {'N': str(value)}
+    if value is None:
+        return {'NULL': True}
+    if isinstance(value, (bytes, bytearray)):
+        return {'B': bytes(value)}
+    if isinstance(value, dict):
+        return {'M': {name: encode_value(nested) for name, nested in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {'L': [encode_value(nested) for nested in value]}
+    if isinstance(value, (set, frozenset)) and value:
+        sample = next(iter(value))
+        if isinstance(sample, str):
+            return {'SS': list(value)}
+        if isinstance(sample, (bytes, bytearray)):
+            return {'BS': [bytes(member) for member in value]}
+        return {'NS': [str(member) for member in value]}
+    raise TypeError(f"Unsupported type for DynamoDB: {type(value).__name__}")
+
+
+def encode_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a dict of native Python values to a low-level DynamoDB item
+    """
+    return {name: encode_value(value) for name, value in item.items()}
@@ -0,0 +1,229 @@
+import logging
+import queue
+import random
+import threading
+import time
+from botocore.exceptions import ClientError
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger()
+
+# BatchWriteItem accepts at most 25 requests
+BATCH_WRITE_SIZE = 25
+
+THROTTLE_ERRORS = {
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded'
+}
+
+# Failed keys kept for the report; the counters still cover every item
+MAX_REPORTED_FAILURES = 100
+
+
+class AdaptiveBackoff:
+    """
+    Delay shared by all writers that doubles on throttling and halves on success
+    """
+
+    def __init__(self, base: float = 0.05, cap: float = 5.0):
+        self.base = base
+        self.cap = cap
+        self.delay = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        delay = self.delay
+        if delay:
+            time.sleep(random.uniform(delay / 2, delay))
+
+    def throttled(self) -> None:
+        with self._lock:
+            self.delay = min(self.cap, max(self.base, self.delay * 2))
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self.delay = self.delay / 2 if self.delay / 2 >= self.base else 0.0
+
+
+class WriteStats:
+    """
+    Thread-safe counters for a bulk write
+    """
+
+    def __init__(self):
+        self.written = 0
+        self.retried = 0
+        self.failed = 0
+        self.throttled = 0
+        self.duplicates = 0
+        self.errors: Dict[str, int] = {}
+        self.failed_keys: List[Dict[str, Any]] = []
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, written: int = 0, retried: int = 0, throttled: int = 0) -> None:
+        with self._lock:
+            self.written += written
+            self.retried += retried
+            self.throttled += throttled
+
+    def record_failure(self, keys: List[Dict[str, Any]], error: str) -> None:
+        with self._lock:
+            self.failed += len(keys)
+            self.errors[error] = self.errors.get(error, 0) + len(keys)
+            room = MAX_REPORTED_FAILURES - len(self.failed_keys)
+            if room > 0:
+                self.failed_keys.extend(keys[:room])
+
+    def as_dict(self) -> Dict[str, Any]:
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return {
+            'written': self.written,
+            'retried': self.retried,
+            'failed': self.failed,
+            'throttled': self.throttled,
+            'duplicates': self.duplicates,
+            'errors': dict(self.errors),
+            'failed_keys': list(self.failed_keys),
+            'elapsed_seconds': round(elapsed, 3),
+            'items_per_second': round(self.written / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+
+class BulkWriter:
+    """
+    Parallel BatchWriteItem engine.
+
+    Items are sharded by primary key across `workers` threads, so writes to
+    the same key stay in order and the last one wins. Within a shard, items
+    with the same key are deduplicated before they are sent (the equivalent
+    of overwrite_by_pkeys). Input is consumed lazily and only a few batches
+    per worker are buffered, so any iterator can be streamed through.
+    """
+
+    def __init__(self, client: Any, table_name: str, key_names: Sequence[str],
+                 workers: int = 4, max_retries: int = 8,
+                 encode: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+                 decode_key: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+                 on_flush: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                 bucket: Optional[Any] = None):
+        self.client = client
+        self.table_name = table_name
+        self.key_names = tuple(key_names)
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.encode = encode or (lambda item: item)
+        self.decode_key = decode_key or (lambda key: key)
+        self.on_flush = on_flush
+        # Optional capacity_manager.TokenBucket pacing writes to a WCU budget
+        self.bucket = bucket
+        self.backoff = AdaptiveBackoff()
+        self.stats = WriteStats()
+
+    def write(self, items: Iterable[Dict[str, Any]]) -> WriteStats:
+        """
+        Write every item and return the final statistics. Items missing a key
+        attribute are counted as failed with 'ValidationException' and skipped.
+        """
+        shards = [queue.Queue(maxsize=4) for _ in range(self.workers)]
+        threads = [
+            threading.Thread(target=self._worker, args=(shard,), daemon=True)
+            for shard in shards
+        ]
+        for thread in threads:
+            thread.start()
+
+        buffers: List[Dict[tuple, Dict[str, Any]]] = [{} for _ in range(self.workers)]
+        try:
+            for item in items:
+                if any(name not in item for name in self.key_names):
+                    # DynamoDB would reject the whole batch; fail only this item
+                    logger.error(f"Item is missing key attributes {list(self.key_names)}")
+                    self.stats.record_failure([{name: item[name] for name in self.key_names if name in item}],
+                                              'ValidationException')
+                    continue
+                key = tuple(item[name] for name in self.key_names)
+                index = hash(key) % self.workers
+                buffer = buffers[index]
+                if key in buffer:
+                    self.stats.duplicates += 1
+                buffer[key] = item
+                if len(buffer) >= BATCH_WRITE_SIZE:
+                    shards[index].put(list(buffer.values()))
+                    buffers[index] = {}
+        finally:
+            for index, buffer in enumerate(buffers):
+                if buffer:
+                    shards[index].put(list(buffer.values()))
+                shards[index].put(None)
+            for thread in threads:
+                thread.join()
+            self.stats.finished = time.monotonic()
+
+        return self.stats
+
+    def _worker(self, batches: queue.Queue) -> None:
+        while True:
+            batch = batches.get()
+            if batch is None:
+                return
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"Unexpected error in bulk write: {str(e)}")
+                self.stats.record_failure([self._key(item) for item in batch], 'InternalError')
+            finally:
+                if self.on_flush:
+                    self.on_flush(batch)
+
+    def _key(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        return {name: item[name] for name in self.key_names}
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """
+        Send one batch of up to 25 puts, retrying throttles and UnprocessedItems
+        """
+        requests = [{'PutRequest': {'Item': self.encode(item)}} for item in batch]
+        attempt = 0
+
+        while requests:
+            self.backoff.wait()
+            try:
+                if self.bucket:
+                    response = self.bucket.call(self.client.batch_write_item,
+                                                RequestItems={self.table_name: requests})
+                else:
+                    response = self.client.batch_write_item(RequestItems={self.table_name: requests})
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                if code in THROTTLE_ERRORS and attempt < self.max_retries:
+                    attempt += 1
+                    self.backoff.throttled()
+                    self.stats.record(retried=len(requests), throttled=1)
+                    continue
+                logger.error(f"Error in bulk write: {str(e)}")
+                self.stats.record_failure(self._request_keys(requests), code)
+                return
+
+            unprocessed = response.get('UnprocessedItems', {}).get(self.table_name, [])
+            self.stats.record(written=len(requests) - len(unprocessed))
+            if not unprocessed:
+                self.backoff.succeeded()
+                return
+            if attempt >= self.max_retries:
+                self.stats.record_failure(self._request_keys(unprocessed), 'UnprocessedItems')
+                return
+
+            attempt += 1
+            self.backoff.throttled()
+            self.stats.record(retried=len(unprocessed), throttled=1)
+            requests = unprocessed
+
+    def _request_keys(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        keys = []
+        for request in requests:
+            item = request['PutRequest']['Item']
+            keys.append(self.decode_key({name: item[name] for name in self.key_names}))
+        return keys
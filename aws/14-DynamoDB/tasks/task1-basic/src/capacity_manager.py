@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger()
+
+
+def consumed_units(response: Dict[str, Any]) -> float:
+    """
+    Total CapacityUnits reported by a response made with ReturnConsumedCapacity
+    """
+    consumed = response.get('ConsumedCapacity')
+    if not consumed:
+        return 0.0
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return float(sum(entry.get('CapacityUnits', 0) for entry in consumed))
+
+
+class CapacityWaitExceeded(Exception):
+    """
+    Raised when pacing a request would wait past the caller's deadline
+    """
+
+    def __init__(self, wait: float):
+        super().__init__(f"Capacity wait of {wait:.1f}s would pass the deadline")
+        self.wait = wait
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` capacity units per second.
+
+    A request first reserves its expected cost (a moving average of what
+    recent requests consumed) and waits out any debt; once the response
+    arrives the reservation is settled against the ConsumedCapacity actually
+    reported. Parallel workers sharing a bucket are paced together instead
+    of bursting until DynamoDB throttles them.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, initial_estimate: float = 1.0):
+        self.rate = rate
+        self.capacity = burst if burst is not None else rate
+        self.tokens = self.capacity
+        self.estimate = initial_estimate
+        self.consumed = 0.0
+        self.waited = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, deadline: Optional[float] = None) -> float:
+        """
+        Reserve the expected cost of one request, blocking while the bucket is in debt.
+
+        With a time.monotonic() deadline, raises CapacityWaitExceeded instead
+        of waiting past it, and nothing is reserved.
+        """
+        with self._lock:
+            self._refill()
+            reserved = self.estimate
+            tokens = self.tokens - reserved
+            wait = -tokens / self.rate if tokens < 0 else 0.0
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise CapacityWaitExceeded(wait)
+            self.tokens = tokens
+            self.waited += wait
+        if wait:
+            time.sleep(wait)
+        return reserved
+
+    def settle(self, reserved: float, consumed: float) -> None:
+        """
+        Charge the difference between a reservation and what was consumed
+        """
+        with self._lock:
+            self.tokens -= consumed - reserved
+            self.consumed += consumed
+            if consumed > 0:
+                self.estimate = 0.8 * self.estimate + 0.2 * consumed
+
+    def call(self, operation: Callable[..., Dict[str, Any]],
+             deadline: Optional[float] = None, **request: Any) -> Dict[str, Any]:
+        """
+        Run a DynamoDB call paced by this bucket and charged with its ConsumedCapacity
+        """
+        request.setdefault('ReturnConsumedCapacity', 'TOTAL')
+        reserved = self.acquire(deadline)
+        consumed = 0.0
+        try:
+            response = operation(**request)
+            consumed = consumed_units(response)
+            return response
+        finally:
+            self.settle(reserved, consumed)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'consumed': round(self.consumed, 2),
+                'waited_seconds': round(self.waited, 3),
+                'estimate': round(self.estimate, 2)
+            }
+
+
+class CapacityLimiter:
+    """
+    Read and write token buckets for background work on one table.
+
+    Only scans and bulk writes draw from the buckets, so online get/query
+    traffic keeps the remaining share of the table's capacity.
+    """
+
+    def __init__(self, read_units: Optional[float] = None, write_units: Optional[float] = None):
+        self.read = TokenBucket(read_units) if read_units else None
+        self.write = TokenBucket(write_units) if write_units else None
+
+    @classmethod
+    def from_table(cls, table: Any, fraction: float,
+                   read_units: Optional[float] = None,
+                   write_units: Optional[float] = None) -> Optional['CapacityLimiter']:
+        """
+        Cap background work at `fraction` of the table's provisioned RCU/WCU.
+
+        On-demand tables report no provisioned throughput, so explicit
+        read_units/write_units are needed to limit them. Returns None when
+        there is nothing to limit.
+        """
+        throughput = table.provisioned_throughput or {}
+        provisioned_read = throughput.get('ReadCapacityUnits') or 0
+        provisioned_write = throughput.get('WriteCapacityUnits') or 0
+
+        read_rate = read_units or provisioned_read * fraction
+        write_rate = write_units or provisioned_write * fraction
+        if not read_rate and not write_rate:
+            return None
+
+        logger.info(f"Background capacity limited to {read_rate} RCU/s and {write_rate} WCU/s")
+        return cls(read_rate, write_rate)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'read': self.read.stats() if self.read else None,
+            'write': self.write.stats() if self.write else None
+        }
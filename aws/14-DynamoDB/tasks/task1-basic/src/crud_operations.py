@@ -2,30 +2,291 @@ import boto3
 import logging
 import json
 import os
+import queue
+import random
+import threading
+import time
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Any, Tuple
+
+from attribute_values import encode_item, make_item_decoder
+from bulk_writer import BulkWriter, WriteStats
+from capacity_manager import CapacityLimiter, CapacityWaitExceeded
+from dynamodb_common import (
+    AGGREGATE_PREFIX,
+    BATCH_GET_CHUNK_SIZE,
+    BATCH_MAX_RETRIES,
+    CLIENT_CONFIG,
+    COUNTER_SHARD_SEPARATOR,
+    DEFAULT_SCAN_SEGMENTS,
+    DYNAMODB_ENDPOINT_URL,
+    TRANSACT_CHUNK_SIZE,
+    TRANSACT_RETRYABLE_REASONS,
+    backoff_delay,
+    build_client_config,
+    decode_cursor,
+    encode_cursor,
+    key_fingerprint,
+    projection_params,
+    update_params
+)
+from item_cache import ItemCache
+from monitoring import OperationMetrics
+from query_planner import QueryPlan, TableSchema, plan_filter
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # Initialize DynamoDB client
-dynamodb = boto3.resource('dynamodb')
+dynamodb = boto3.resource('dynamodb', config=CLIENT_CONFIG, endpoint_url=DYNAMODB_ENDPOINT_URL)
+
+# Low-level client fast path for reads (numbers decoded as int, float or decimal)
+FAST_PATH = os.environ.get('DDB_FAST_PATH', 'false').lower() == 'true'
+NUMBER_MODE = os.environ.get('DDB_NUMBER_MODE', 'int')
+
+# Parallel scan settings
+MAX_SCAN_WORKERS = int(os.environ.get('MAX_SCAN_WORKERS', '16'))
+
+# BatchGetItem settings
+MAX_BATCH_WORKERS = int(os.environ.get('MAX_BATCH_WORKERS', '8'))
+
+# Read-through item cache (ITEM_CACHE_SIZE=0 disables it)
+ITEM_CACHE_SIZE = int(os.environ.get('ITEM_CACHE_SIZE', '0'))
+ITEM_CACHE_TTL = float(os.environ.get('ITEM_CACHE_TTL', '60'))
+
+# Filtered scans are rewritten into queries on a matching key or index unless
+# QUERY_PLANNER=false; DescribeTable results are reused for SCHEMA_CACHE_TTL seconds
+QUERY_PLANNER = os.environ.get('QUERY_PLANNER', 'true').lower() == 'true'
+SCHEMA_CACHE_TTL = float(os.environ.get('SCHEMA_CACHE_TTL', '300'))
+
+# Sharded counters: default shard count, per-key overrides (JSON object of
+# key -> shards) and a short-lived cache for aggregated totals (0 disables it)
+COUNTER_SHARDS = int(os.environ.get('COUNTER_SHARDS', '10'))
+COUNTER_SHARDS_BY_KEY: Dict[str, int] = json.loads(os.environ.get('COUNTER_SHARDS_BY_KEY') or '{}')
+COUNTER_CACHE_TTL = float(os.environ.get('COUNTER_CACHE_TTL', '0'))
+COUNTER_CACHE_SIZE = 1024
+
+# Share of provisioned RCU/WCU that scans and bulk writes may use (0 disables
+# the limiter); explicit unit caps also cover on-demand tables
+BACKGROUND_CAPACITY_FRACTION = float(os.environ.get('BACKGROUND_CAPACITY_FRACTION', '0'))
+BACKGROUND_READ_UNITS = float(os.environ.get('BACKGROUND_READ_UNITS', '0'))
+BACKGROUND_WRITE_UNITS = float(os.environ.get('BACKGROUND_WRITE_UNITS', '0'))
+
+# Per-operation latency, retry, throttle and consumed capacity metrics,
+# flushed as CloudWatch Embedded Metric Format once per invocation
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'DynamoDBOperations')
+
+# Multi-operation invocations
+MAX_OPERATIONS_PER_INVOCATION = int(os.environ.get('MAX_OPERATIONS_PER_INVOCATION', '100'))
+KEYED_OPERATIONS = {'create', 'read', 'update', 'delete'}
+RANGE_READ_OPERATIONS = {
+    'query', 'scan', 'explain', 'batch_read', 'counters', 'aggregate', 'cache_stats', 'capacity_stats',
+    'metrics_stats'
+}
+
+# Time (ms) kept in reserve before the Lambda deadline to build the response
+TIME_BUDGET_RESERVE_MS = 2000
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+# Marker a scan worker puts on the page queue once its segment is exhausted
+_SEGMENT_DONE = object()
+
+# Item caches and operations instances by table name, kept at module level
+# to survive warm invocations
+_item_caches: Dict[str, ItemCache] = {}
+_counter_caches: Dict[str, ItemCache] = {}
+_capacity_limiters: Dict[str, Optional[CapacityLimiter]] = {}
+_operations: Dict[str, 'DynamoDBOperations'] = {}
+operation_metrics = OperationMetrics(METRICS_NAMESPACE) if METRICS_ENABLED else None
+
+
+def serialize_key(key: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Convert a key to DynamoDB JSON so it survives a json round trip
+    """
+    if key is None:
+        return None
+    return {name: _serializer.serialize(value) for name, value in key.items()}
+
+
+def deserialize_key(key: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Convert a key from DynamoDB JSON back to Python types
+    """
+    if key is None:
+        return None
+    return {name: _deserializer.deserialize(value) for name, value in key.items()}
+
+
+def remaining_time_budget_ms(context: Any) -> Optional[int]:
+    """
+    Milliseconds an invocation can keep working before it must respond
+    """
+    if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return None
+    return max(0, context.get_remaining_time_in_millis() - TIME_BUDGET_RESERVE_MS)
+
+
+def shared_item_cache(table_name: str) -> Optional[ItemCache]:
+    """
+    Return the container-wide item cache for a table, or None if caching is disabled
+    """
+    if ITEM_CACHE_SIZE <= 0:
+        return None
+    cache = _item_caches.get(table_name)
+    if cache is None:
+        cache = _item_caches[table_name] = ItemCache(ITEM_CACHE_SIZE, ITEM_CACHE_TTL)
+    return cache
+
+
+def shared_counter_cache(table_name: str) -> Optional[ItemCache]:
+    """
+    Return the container-wide cache of counter totals for a table, or None if disabled
+    """
+    if COUNTER_CACHE_TTL <= 0:
+        return None
+    cache = _counter_caches.get(table_name)
+    if cache is None:
+        cache = _counter_caches[table_name] = ItemCache(COUNTER_CACHE_SIZE, COUNTER_CACHE_TTL)
+    return cache
+
+
+def shared_capacity_limiter(table_name: str) -> Optional[CapacityLimiter]:
+    """
+    Return the container-wide background capacity limiter for a table, or
+    None if limiting is disabled or the table has nothing to limit
+    """
+    if not (BACKGROUND_CAPACITY_FRACTION or BACKGROUND_READ_UNITS or BACKGROUND_WRITE_UNITS):
+        return None
+    if table_name not in _capacity_limiters:
+        try:
+            _capacity_limiters[table_name] = CapacityLimiter.from_table(
+                dynamodb.Table(table_name),
+                BACKGROUND_CAPACITY_FRACTION,
+                read_units=BACKGROUND_READ_UNITS,
+                write_units=BACKGROUND_WRITE_UNITS
+            )
+        except ClientError as e:
+            logger.warning(f"Capacity limiter disabled, cannot describe table {table_name}: {str(e)}")
+            return None
+    return _capacity_limiters[table_name]
+
+def get_operations(table_name: str) -> 'DynamoDBOperations':
+    """
+    Return the DynamoDBOperations for a table, reusing it across warm invocations
+    """
+    db_ops = _operations.get(table_name)
+    if db_ops is None:
+        db_ops = _operations[table_name] = DynamoDBOperations(
+            table_name,
+            cache=shared_item_cache(table_name),
+            capacity_limiter=shared_capacity_limiter(table_name),
+            fast_path=FAST_PATH,
+            number_mode=NUMBER_MODE,
+            counter_cache=shared_counter_cache(table_name),
+            metrics=operation_metrics
+        )
+        for key, shards in COUNTER_SHARDS_BY_KEY.items():
+            db_ops.set_counter_shards(key, shards)
+    return db_ops
 
 class DynamoDBOperations:
-    def __init__(self, table_name: str):
+    def __init__(self, table_name: str, cache: Optional[ItemCache] = None,
+                 config: Optional[Config] = None, fast_path: bool = False,
+                 number_mode: str = 'decimal',
+                 capacity_limiter: Optional[CapacityLimiter] = None,
+                 counter_shards: int = COUNTER_SHARDS,
+                 counter_cache: Optional[ItemCache] = None,
+                 metrics: Optional[OperationMetrics] = None):
         """
-        Initialize DynamoDB operations with table name
+        Initialize DynamoDB operations with table name, an optional
+        read-through item cache and an optional botocore Config. Without a
+        config the shared module-level resource is used.
+
+        With fast_path, reads go through a plain low-level client and items
+        are decoded by attribute_values instead of boto3's TypeDeserializer;
+        number_mode picks 'int', 'float' or 'decimal' for numbers.
+
+        A capacity_limiter paces scans and bulk writes to a share of the
+        table's capacity using the ConsumedCapacity of each response.
+
+        Sharded counters spread each key over counter_shards items by default;
+        counter_cache optionally holds aggregated totals for a short TTL.
+
+        With metrics, every call made through the client is timed and its
+        retries, throttles and ConsumedCapacity are recorded.
         """
-        self.table = dynamodb.Table(table_name)
+        resource = dynamodb
+        if config is not None:
+            resource = boto3.resource('dynamodb', config=config, endpoint_url=DYNAMODB_ENDPOINT_URL)
+        self.table = resource.Table(table_name)
         self.table_name = table_name
+        self.cache = cache
+        self.fast_path = fast_path
+        self.limiter = capacity_limiter
+        self.counter_shards = counter_shards
+        self.counter_cache = counter_cache
+        self._counter_shard_overrides: Dict[str, int] = {}
+        self._key_names: Optional[List[str]] = None
+        self._schema: Optional[TableSchema] = None
+        self._schema_loaded = 0.0
+
+        # Clients are thread-safe, so parallel scans and batch reads share one
+        if fast_path:
+            self.client = boto3.client('dynamodb', config=config or CLIENT_CONFIG,
+                                       endpoint_url=DYNAMODB_ENDPOINT_URL)
+            self._decode_item = make_item_decoder(number_mode)
+        else:
+            # The resource's own client converts types just like the Table does
+            self.client = self.table.meta.client
+            self._decode_item = None
+
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.instrument(self.client)
+
+    def _encode(self, values: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Convert keys or expression values to what self.client expects
+        """
+        if self.fast_path and values:
+            return encode_item(values)
+        return values
+
+    def _decode_items(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Convert items returned by self.client to native Python types
+        """
+        if self.fast_path:
+            return [self._decode_item(item) for item in items]
+        return items
+
+    def _decode_key(self, key: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Convert a LastEvaluatedKey or unprocessed key returned by self.client
+        """
+        if self.fast_path and key:
+            # Keys keep exact Decimal numbers so cursors round-trip losslessly
+            return deserialize_key(key)
+        return key
 
     def create_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
         """
         Create a new item in the table
         """
         try:
-            response = self.table.put_item(Item=item)
+            response = self.client.put_item(TableName=self.table_name, Item=self._encode(item))
+            if self.cache:
+                # Invalidate rather than refresh so the next read caches the
+                # item with the types DynamoDB returns (e.g. Decimal)
+                self.cache.invalidate(item)
             logger.info(f"Successfully created item in table {self.table_name}")
             return {
                 'success': True,
@@ -40,15 +301,36 @@ class DynamoDBOperations:
                 'error': e.response['Error']['Code']
             }
 
-    def get_item(self, key: Dict[str, Any]) -> Dict[str, Any]:
+    def get_item(self, key: Dict[str, Any],
+                 attributes: Optional[List[str]] = None) -> Dict[str, Any]:
         """
-        Retrieve an item from the table by its key
+        Retrieve an item from the table by its key, optionally only the
+        listed attributes
         """
         try:
-            response = self.table.get_item(Key=key)
+            item = self.cache.get(key) if self.cache else None
+            if item:
+                if attributes:
+                    item = {name: item[name] for name in attributes if name in item}
+                return {
+                    'success': True,
+                    'message': 'Item retrieved successfully',
+                    'data': item
+                }
+
+            response = self.client.get_item(
+                TableName=self.table_name,
+                Key=self._encode(key),
+                **projection_params(attributes)
+            )
             item = response.get('Item')
             
             if item:
+                if self.fast_path:
+                    item = self._decode_item(item)
+                # Partial items must not be served to full reads
+                if self.cache and not attributes:
+                    self.cache.put(key, item)
                 logger.info(f"Successfully retrieved item from table {self.table_name}")
                 return {
                     'success': True,
@@ -70,39 +352,30 @@ class DynamoDBOperations:
                 'error': e.response['Error']['Code']
             }
 
-    def update_item(self, key: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, Any]:
+    def update_item(self, key: Dict[str, Any], updates: Optional[Dict[str, Any]] = None,
+                    remove: Optional[List[str]] = None,
+                    add: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
-        Update an existing item in the table
+        Update an existing item in the table: SET the `updates` attributes,
+        REMOVE the `remove` attributes and ADD the `add` increments
         """
         try:
-            # Construct update expression and attribute values
-            update_expression = "SET "
-            expression_attribute_values = {}
-            expression_attribute_names = {}
-            
-            for field, value in updates.items():
-                placeholder = f":val_{field}"
-                name_placeholder = f"#{field}"
-                update_expression += f" {name_placeholder} = {placeholder},"
-                expression_attribute_values[placeholder] = value
-                expression_attribute_names[name_placeholder] = field
-            
-            # Remove trailing comma
-            update_expression = update_expression.rstrip(',')
-            
-            response = self.table.update_item(
-                Key=key,
-                UpdateExpression=update_expression,
-                ExpressionAttributeValues=expression_attribute_values,
-                ExpressionAttributeNames=expression_attribute_names,
-                ReturnValues="ALL_NEW"
+            response = self.client.update_item(
+                ReturnValues="ALL_NEW",
+                **self._update_request(key, updates, remove, add)
             )
             
+            attributes = response.get('Attributes', {})
+            if self.fast_path and attributes:
+                attributes = self._decode_item(attributes)
+            if self.cache:
+                self.cache.refresh(attributes)
+
             logger.info(f"Successfully updated item in table {self.table_name}")
             return {
                 'success': True,
                 'message': 'Item updated successfully',
-                'data': response.get('Attributes', {})
+                'data': attributes
             }
         except ClientError as e:
             logger.error(f"Error updating item: {str(e)}")
@@ -112,12 +385,168 @@ class DynamoDBOperations:
                 'error': e.response['Error']['Code']
             }
 
+    def _update_request(self, key: Dict[str, Any], updates: Optional[Dict[str, Any]] = None,
+                        remove: Optional[List[str]] = None,
+                        add: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        UpdateItem parameters for one item, encoded for self.client
+        """
+        params = update_params(updates, remove, add)
+        if 'ExpressionAttributeValues' in params:
+            params['ExpressionAttributeValues'] = self._encode(params['ExpressionAttributeValues'])
+        params['TableName'] = self.table_name
+        params['Key'] = self._encode(key)
+        return params
+
+    def bulk_update(self, updates: Iterable[Dict[str, Any]], atomic: bool = False,
+                    workers: int = MAX_BATCH_WORKERS) -> Dict[str, Any]:
+        """
+        Apply many updates, each {'key', 'updates', 'remove', 'add'}.
+
+        By default the updates are independent UpdateItem calls run by a pool
+        of `workers` threads. With atomic=True they go through transact_update
+        instead. 'stats' has the same shape as bulk_write's.
+        """
+        if atomic:
+            return self.transact_update(updates, workers)
+
+        stats = WriteStats()
+        bucket = self.limiter.write if self.limiter else None
+
+        def apply(update: Dict[str, Any]) -> None:
+            key = update.get('key', {})
+            try:
+                request = self._update_request(key, update.get('updates'), update.get('remove'), update.get('add'))
+                if bucket:
+                    bucket.call(self.client.update_item, **request)
+                else:
+                    self.client.update_item(**request)
+                stats.record(written=1)
+            except ClientError as e:
+                stats.record_failure([key], e.response['Error']['Code'])
+            except ValueError:
+                stats.record_failure([key], 'ValidationError')
+            finally:
+                if self.cache:
+                    self.cache.invalidate(key)
+
+        # Submit a bounded window at a time so long iterators are not materialised
+        window = max(1, workers) * 32
+        pending = []
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for update in updates:
+                pending.append(update)
+                if len(pending) >= window:
+                    list(executor.map(apply, pending))
+                    pending = []
+            list(executor.map(apply, pending))
+        stats.finished = time.monotonic()
+        return self._update_result(stats.as_dict())
+
+    def transact_update(self, updates: Iterable[Dict[str, Any]],
+                        workers: int = MAX_BATCH_WORKERS) -> Dict[str, Any]:
+        """
+        Apply updates with TransactWriteItems in chunks of 100.
+
+        Each chunk succeeds or fails as a whole; chunks run concurrently, so
+        atomicity holds per chunk, not across the whole input. A key may only
+        appear once per transaction, so pass each key at most once.
+        """
+        stats = WriteStats()
+        chunk: List[Dict[str, Any]] = []
+        futures = []
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for update in updates:
+                chunk.append(update)
+                if len(chunk) >= TRANSACT_CHUNK_SIZE:
+                    futures.append(executor.submit(self._transact_chunk, chunk, stats))
+                    chunk = []
+                    # Keep a bounded number of chunks in flight
+                    if len(futures) >= max(1, workers) * 2:
+                        futures.pop(0).result()
+            if chunk:
+                futures.append(executor.submit(self._transact_chunk, chunk, stats))
+            for future in futures:
+                future.result()
+        stats.finished = time.monotonic()
+        return self._update_result(stats.as_dict())
+
+    def _transact_chunk(self, chunk: List[Dict[str, Any]], stats: WriteStats) -> None:
+        """
+        Run one TransactWriteItems of up to 100 updates, retrying throttles and conflicts
+        """
+        keys = [update.get('key', {}) for update in chunk]
+        try:
+            actions = [
+                {'Update': self._update_request(key, update.get('updates'), update.get('remove'), update.get('add'))}
+                for key, update in zip(keys, chunk)
+            ]
+        except ValueError:
+            stats.record_failure(keys, 'ValidationError')
+            return
+
+        bucket = self.limiter.write if self.limiter else None
+        try:
+            for attempt in range(BATCH_MAX_RETRIES + 1):
+                try:
+                    if bucket:
+                        bucket.call(self.client.transact_write_items, TransactItems=actions)
+                    else:
+                        self.client.transact_write_items(TransactItems=actions)
+                    stats.record(written=len(actions))
+                    return
+                except ClientError as e:
+                    code = e.response['Error']['Code']
+                    reasons = {
+                        reason.get('Code') for reason in e.response.get('CancellationReasons', [])
+                    } - {'None', None}
+                    retryable = (code == 'TransactionCanceledException'
+                                 and reasons and reasons <= TRANSACT_RETRYABLE_REASONS)
+                    if not retryable or attempt == BATCH_MAX_RETRIES:
+                        logger.error(f"Error in transactional update: {str(e)}")
+                        stats.record_failure(keys, next(iter(reasons)) if reasons else code)
+                        return
+                    stats.record(retried=len(actions), throttled=1)
+                    time.sleep(backoff_delay(attempt))
+        except Exception as e:
+            logger.error(f"Unexpected error in transactional update: {str(e)}")
+            stats.record_failure(keys, 'InternalError')
+        finally:
+            if self.cache:
+                for key in keys:
+                    self.cache.invalidate(key)
+
+    def _update_result(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Response for bulk_update/transact_update built from WriteStats.as_dict()
+        """
+        if stats['failed']:
+            logger.error(f"Failed to update {stats['failed']} items in table {self.table_name}")
+            return {
+                'success': False,
+                'message': f"Updated {stats['written']} items, {stats['failed']} failed",
+                'error': next(iter(stats['errors'])),
+                'count': stats['written'],
+                'stats': stats
+            }
+
+        logger.info(f"Successfully updated {stats['written']} items in table {self.table_name} "
+                    f"({stats['items_per_second']} items/s)")
+        return {
+            'success': True,
+            'message': 'Bulk update executed successfully',
+            'count': stats['written'],
+            'stats': stats
+        }
+
     def delete_item(self, key: Dict[str, Any]) -> Dict[str, Any]:
         """
         Delete an item from the table
         """
         try:
-            response = self.table.delete_item(Key=key)
+            response = self.client.delete_item(TableName=self.table_name, Key=self._encode(key))
+            if self.cache:
+                self.cache.invalidate(key)
             logger.info(f"Successfully deleted item from table {self.table_name}")
             return {
                 'success': True,
@@ -131,17 +560,17 @@ class DynamoDBOperations:
                 'error': e.response['Error']['Code']
             }
 
-    def query_items(self, key_condition: str, values: Dict[str, Any]) -> Dict[str, Any]:
+    def query_items(self, key_condition: str, values: Dict[str, Any],
+                    page_size: Optional[int] = None,
+                    scan_forward: bool = True,
+                    max_items: Optional[int] = None,
+                    attributes: Optional[List[str]] = None) -> Dict[str, Any]:
         """
-        Query items using key condition expression
+        Query items using key condition expression, following every page
         """
         try:
-            response = self.table.query(
-                KeyConditionExpression=key_condition,
-                ExpressionAttributeValues=values
-            )
-            
-            items = response.get('Items', [])
+            items = list(self.iter_query(key_condition, values, page_size, scan_forward, max_items,
+                                         attributes=attributes))
             logger.info(f"Successfully queried {len(items)} items from table {self.table_name}")
             
             return {
@@ -158,51 +587,529 @@ class DynamoDBOperations:
                 'error': e.response['Error']['Code']
             }
 
+    def iter_query(self, key_condition: str, values: Dict[str, Any],
+                   page_size: Optional[int] = None,
+                   scan_forward: bool = True,
+                   max_items: Optional[int] = None,
+                   cursor: Optional[str] = None,
+                   attributes: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream query results page by page, stopping after max_items items
+        """
+        params = self._query_params(key_condition, values, scan_forward, attributes)
+        start_key = self._query_start_key(cursor)
+        for items, _ in self._iter_query_pages(params, start_key, page_size, max_items):
+            yield from items
+
+    def query_with_cursor(self, key_condition: str, values: Dict[str, Any],
+                          cursor: Optional[str] = None,
+                          page_size: Optional[int] = None,
+                          scan_forward: bool = True,
+                          max_items: Optional[int] = None,
+                          time_budget_ms: Optional[int] = None,
+                          attributes: Optional[List[str]] = None,
+                          index_name: Optional[str] = None,
+                          filter_expression: Optional[str] = None,
+                          names: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Query one bounded page of results and a continuation cursor, on the
+        table or on index_name, with an optional FilterExpression.
+
+        The cursor points right after the last item in 'data' and is None once
+        the partition is exhausted.
+        """
+        try:
+            params = self._query_params(key_condition, values, scan_forward, attributes,
+                                        index_name, filter_expression, names)
+            start_key = self._query_start_key(cursor)
+
+            deadline = None
+            if time_budget_ms is not None:
+                deadline = time.monotonic() + time_budget_ms / 1000.0
+
+            items = []
+            last_key = start_key
+            for page_items, last_key in self._iter_query_pages(params, start_key, page_size, max_items):
+                items.extend(page_items)
+                if deadline is not None and time.monotonic() >= deadline:
+                    logger.warning(f"Query on table {self.table_name} stopped at the time budget")
+                    break
+
+            next_cursor = encode_cursor({'last_key': serialize_key(last_key)}) if last_key else None
+
+            logger.info(f"Successfully queried {len(items)} items from table {self.table_name}")
+            return {
+                'success': True,
+                'message': 'Query executed successfully',
+                'data': items,
+                'count': len(items),
+                'cursor': next_cursor
+            }
+        except ClientError as e:
+            logger.error(f"Error querying items: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': e.response['Error']['Code']
+            }
+
+    def _query_params(self, key_condition: str, values: Dict[str, Any],
+                      scan_forward: bool,
+                      attributes: Optional[List[str]] = None,
+                      index_name: Optional[str] = None,
+                      filter_expression: Optional[str] = None,
+                      names: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Build the Query request parameters shared by every page
+        """
+        params = {
+            'TableName': self.table_name,
+            'KeyConditionExpression': key_condition,
+            'ExpressionAttributeValues': self._encode(values),
+            'ScanIndexForward': scan_forward,
+            **projection_params(attributes)
+        }
+        if index_name:
+            params['IndexName'] = index_name
+        if filter_expression:
+            params['FilterExpression'] = filter_expression
+        if names:
+            params['ExpressionAttributeNames'] = {**params.get('ExpressionAttributeNames', {}), **names}
+        return params
+
+    @staticmethod
+    def _query_start_key(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Extract the ExclusiveStartKey from a query cursor
+        """
+        if not cursor:
+            return None
+        return deserialize_key(decode_cursor(cursor).get('last_key'))
+
+    def _iter_query_pages(self, params: Dict[str, Any],
+                          start_key: Optional[Dict[str, Any]],
+                          page_size: Optional[int],
+                          max_items: Optional[int]
+                          ) -> Iterator[Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+        """
+        Yield (items, LastEvaluatedKey) pages of a query.
+
+        Limit is lowered on the last request so a page never overshoots
+        max_items and LastEvaluatedKey always matches the last item returned.
+        """
+        request = dict(params)
+        remaining = max_items
+
+        while remaining is None or remaining > 0:
+            limit = page_size
+            if remaining is not None:
+                limit = min(limit, remaining) if limit else remaining
+            if limit:
+                request['Limit'] = limit
+            if start_key:
+                request['ExclusiveStartKey'] = self._encode(start_key)
+
+            response = self.client.query(**request)
+            items = self._decode_items(response.get('Items', []))
+            start_key = self._decode_key(response.get('LastEvaluatedKey'))
+            if remaining is not None:
+                remaining -= len(items)
+            yield items, start_key
+            if not start_key:
+                return
+
+    @property
+    def key_names(self) -> List[str]:
+        """
+        Primary key attribute names, loaded once from DescribeTable
+        """
+        if self._key_names is None:
+            self._key_names = [key['AttributeName'] for key in self.table.key_schema]
+        return self._key_names
+
+    def set_counter_shards(self, key: str, shards: int) -> None:
+        """
+        Use a different shard count for one counter key, e.g. a viral user.
+
+        Raising the count is always safe. Lowering it hides the shards above
+        the new count, so only lower it for counters that are reset.
+        """
+        if not 1 <= shards <= BATCH_GET_CHUNK_SIZE:
+            raise ValueError(f"Counter shards must be between 1 and {BATCH_GET_CHUNK_SIZE}")
+        self._counter_shard_overrides[key] = shards
+
+    def _counter_shard_keys(self, key: str, shards: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Primary keys of every shard item of a counter key
+        """
+        if len(self.key_names) != 1:
+            raise ValueError("Sharded counters need a table with a partition key only")
+        shards = shards or self._counter_shard_overrides.get(key, self.counter_shards)
+        key_name = self.key_names[0]
+        return [{key_name: f"{key}{COUNTER_SHARD_SEPARATOR}{shard}"} for shard in range(shards)]
+
+    def increment_counter(self, key: str, counters: Dict[str, int],
+                          shards: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Atomically ADD the given amounts to one randomly chosen shard of a counter key.
+
+        Spreading increments over several items keeps a hot key from
+        concentrating its writes on a single partition.
+        """
+        try:
+            shard_key = random.choice(self._counter_shard_keys(key, shards))
+            self.client.update_item(ReturnValues='NONE', **self._update_request(shard_key, add=counters))
+            if self.counter_cache:
+                self.counter_cache.invalidate({self.key_names[0]: key})
+
+            return {
+                'success': True,
+                'message': 'Counters incremented successfully'
+            }
+        except ClientError as e:
+            logger.error(f"Error incrementing counters: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': e.response['Error']['Code']
+            }
+
+    def get_counters(self, key: str, shards: Optional[int] = None,
+                     consistent_read: bool = False) -> Dict[str, Any]:
+        """
+        Sum every counter of a key across its shards with one BatchGetItem.
+
+        Totals are served from the counter cache while fresh. Shard items
+        bypass the item cache, so its TTL does not add to counter staleness.
+        """
+        try:
+            cache_key = {self.key_names[0]: key}
+            totals = self.counter_cache.get(cache_key) if self.counter_cache and not consistent_read else None
+            if totals is None:
+                items, unprocessed = self._batch_get_chunk(self._counter_shard_keys(key, shards), consistent_read)
+                if unprocessed:
+                    return {
+                        'success': False,
+                        'message': 'Some counter shards could not be read, retry later',
+                        'error': 'UnprocessedKeys'
+                    }
+
+                totals = {}
+                for item in items:
+                    for name, value in item.items():
+                        if name != self.key_names[0]:
+                            totals[name] = totals.get(name, 0) + value
+                if self.counter_cache:
+                    self.counter_cache.put(cache_key, {**totals, **cache_key})
+            else:
+                totals.pop(self.key_names[0], None)
+
+            return {
+                'success': True,
+                'message': 'Counters retrieved successfully',
+                'data': totals
+            }
+        except ClientError as e:
+            logger.error(f"Error reading counters: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': e.response['Error']['Code']
+            }
+
+    def get_aggregate(self, dimension: str = 'table', value: Any = 'all') -> Dict[str, Any]:
+        """
+        Read one aggregate item kept up to date by stream_aggregator
+        """
+        return self.get_item({self.key_names[0]: f"{AGGREGATE_PREFIX}{dimension}#{value}"})
+
     def batch_write_items(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Write multiple items in batch
         """
+        return self.bulk_write(items)
+
+    def bulk_write(self, items: Iterable[Dict[str, Any]],
+                   workers: int = MAX_BATCH_WORKERS,
+                   overwrite_by_pkeys: Optional[List[str]] = None,
+                   paced: bool = True) -> Dict[str, Any]:
+        """
+        Write a stream of items with a pool of parallel batch writers.
+
+        Items sharing a primary key (overwrite_by_pkeys, the table key by
+        default) are deduplicated so the last one wins. Throttling backs all
+        writers off together. 'stats' reports written, retried and failed
+        counts and items/sec; failed keys are listed rather than lost.
+        paced=False skips the background write bucket, for online writes
+        that are only batched for efficiency.
+        """
         try:
-            with self.table.batch_writer() as batch:
+            writer = BulkWriter(
+                self.client,
+                self.table_name,
+                overwrite_by_pkeys or self.key_names,
+                workers=workers,
+                encode=self._encode,
+                decode_key=self._decode_key,
+                bucket=self.limiter.write if self.limiter and paced else None,
+                # Drop cached copies once a batch is done, even if it failed
+                on_flush=self._invalidate_cached if self.cache else None
+            )
+            stats = writer.write(items).as_dict()
+        except ClientError as e:
+            logger.error(f"Error in batch write: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': e.response['Error']['Code']
+            }
+
+        if stats['failed']:
+            logger.error(f"Failed to write {stats['failed']} items to table {self.table_name}")
+            return {
+                'success': False,
+                'message': f"Wrote {stats['written']} items, {stats['failed']} failed",
+                'error': next(iter(stats['errors'])),
+                'count': stats['written'],
+                'stats': stats
+            }
+
+        logger.info(f"Successfully batch wrote {stats['written']} items to table {self.table_name} "
+                    f"({stats['items_per_second']} items/s)")
+        return {
+            'success': True,
+            'message': f"Successfully wrote {stats['written']} items",
+            'count': stats['written'],
+            'stats': stats
+        }
+
+    def _invalidate_cached(self, items: List[Dict[str, Any]]) -> None:
+        """
+        Drop the cached copies of written items
+        """
+        for item in items:
+            self.cache.invalidate(item)
+
+    def batch_get_items(self, keys: List[Dict[str, Any]],
+                        consistent_read: bool = False) -> Dict[str, Any]:
+        """
+        Retrieve many items by key with BatchGetItem.
+
+        Keys are deduplicated, served from the item cache when possible, and
+        the rest split into chunks of 100 that are fetched concurrently.
+        'data' lines up with the input keys and holds None where an item does
+        not exist; those keys are also listed under 'missing'.
+        """
+        try:
+            if not keys:
+                return {
+                    'success': True,
+                    'message': 'No keys requested',
+                    'data': [],
+                    'count': 0,
+                    'missing': []
+                }
+
+            key_names = tuple(sorted(keys[0]))
+            unique_keys = {}
+            for key in keys:
+                unique_keys.setdefault(key_fingerprint(key, key_names), key)
+
+            found = {}
+            pending = []
+            for fingerprint, key in unique_keys.items():
+                item = self.cache.get(key) if self.cache else None
+                if item:
+                    found[fingerprint] = item
+                else:
+                    pending.append(key)
+
+            chunks = [
+                pending[i:i + BATCH_GET_CHUNK_SIZE]
+                for i in range(0, len(pending), BATCH_GET_CHUNK_SIZE)
+            ]
+
+            unprocessed = []
+            if not chunks:
+                results = []
+            elif len(chunks) == 1:
+                results = [self._batch_get_chunk(chunks[0], consistent_read)]
+            else:
+                with ThreadPoolExecutor(max_workers=min(len(chunks), MAX_BATCH_WORKERS)) as executor:
+                    results = list(executor.map(
+                        lambda chunk: self._batch_get_chunk(chunk, consistent_read), chunks
+                    ))
+            for items, leftover in results:
                 for item in items:
-                    batch.put_item(Item=item)
+                    fingerprint = key_fingerprint(item, key_names)
+                    found[fingerprint] = item
+                    if self.cache:
+                        self.cache.put(unique_keys[fingerprint], item)
+                unprocessed.extend(leftover)
+
+            unprocessed_ids = {key_fingerprint(key, key_names) for key in unprocessed}
+            data = []
+            missing = []
+            for key in keys:
+                fingerprint = key_fingerprint(key, key_names)
+                item = found.get(fingerprint)
+                data.append(item)
+                if item is None and fingerprint not in unprocessed_ids:
+                    missing.append(key)
+
+            logger.info(f"Successfully batch read {len(found)} of {len(unique_keys)} items from table {self.table_name}")
+            response = {
+                'success': not unprocessed,
+                'message': 'Batch read executed successfully',
+                'data': data,
+                'count': len(data) - data.count(None),
+                'missing': missing
+            }
+            if unprocessed:
+                logger.warning(f"{len(unprocessed)} keys were still unprocessed after {BATCH_MAX_RETRIES} retries")
+                response['message'] = 'Some keys could not be read, retry them later'
+                response['error'] = 'UnprocessedKeys'
+                response['unprocessed'] = unprocessed
+            return response
+        except ClientError as e:
+            logger.error(f"Error in batch read: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': e.response['Error']['Code']
+            }
+
+    def _batch_get_chunk(self, keys: List[Dict[str, Any]], consistent_read: bool
+                         ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Fetch up to 100 keys, retrying UnprocessedKeys with jittered backoff.
+        Returns the items found and the keys that could not be processed.
+        """
+        request = {
+            self.table_name: {
+                'Keys': [self._encode(key) for key in keys],
+                'ConsistentRead': consistent_read
+            }
+        }
+        items = []
+
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            if attempt:
+                time.sleep(backoff_delay(attempt))
+            response = self.client.batch_get_item(RequestItems=request)
+            items.extend(self._decode_items(response.get('Responses', {}).get(self.table_name, [])))
+            request = response.get('UnprocessedKeys') or {}
+            if not request:
+                return items, []
+
+        return items, [self._decode_key(key) for key in request[self.table_name]['Keys']]
+
+    def scan_table(self, filter_expression: Optional[str] = None, 
+                  values: Optional[Dict[str, Any]] = None,
+                  segments: int = 1,
+                  attributes: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Scan the entire table with optional filter, following every page
+        """
+        try:
+            items = list(self.iter_scan(filter_expression, values, segments, attributes=attributes))
+            logger.info(f"Successfully scanned {len(items)} items from table {self.table_name}")
             
-            logger.info(f"Successfully batch wrote {len(items)} items to table {self.table_name}")
             return {
                 'success': True,
-                'message': f'Successfully wrote {len(items)} items',
+                'message': 'Scan executed successfully',
+                'data': items,
                 'count': len(items)
             }
         except ClientError as e:
-            logger.error(f"Error in batch write: {str(e)}")
+            logger.error(f"Error scanning table: {str(e)}")
             return {
                 'success': False,
                 'message': str(e),
                 'error': e.response['Error']['Code']
             }
 
-    def scan_table(self, filter_expression: Optional[str] = None, 
-                  values: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def iter_scan(self, filter_expression: Optional[str] = None,
+                  values: Optional[Dict[str, Any]] = None,
+                  segments: int = DEFAULT_SCAN_SEGMENTS,
+                  page_size: Optional[int] = None,
+                  attributes: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream items from a full-table scan as pages arrive.
+
+        The table is split into `segments` parallel Segment/TotalSegments
+        workers. Only a few pages are buffered at a time, so memory stays flat
+        no matter how large the table is.
+        """
+        params = self._scan_params(filter_expression, values, page_size, attributes)
+        start_keys = {segment: None for segment in range(segments)}
+        for _, items, _ in self._iter_segment_pages(params, segments, start_keys):
+            yield from items
+
+    def scan_with_cursor(self, filter_expression: Optional[str] = None,
+                         values: Optional[Dict[str, Any]] = None,
+                         segments: int = DEFAULT_SCAN_SEGMENTS,
+                         cursor: Optional[str] = None,
+                         page_size: Optional[int] = None,
+                         max_items: Optional[int] = None,
+                         time_budget_ms: Optional[int] = None,
+                         attributes: Optional[List[str]] = None,
+                         names: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """
-        Scan the entire table with optional filter
+        Scan until the table, the item cap or the time budget is exhausted.
+
+        Pages are consumed whole, so the returned cursor resumes every segment
+        exactly after the last page included in 'data'. The cursor is None once
+        all segments are finished.
         """
         try:
-            if filter_expression and values:
-                response = self.table.scan(
-                    FilterExpression=filter_expression,
-                    ExpressionAttributeValues=values
-                )
+            if cursor:
+                state = decode_cursor(cursor)
+                segments = state['total_segments']
+                start_keys = {
+                    int(segment): deserialize_key(key)
+                    for segment, key in state['segments'].items()
+                }
             else:
-                response = self.table.scan()
-            
-            items = response.get('Items', [])
+                start_keys = {segment: None for segment in range(segments)}
+
+            deadline = None
+            if time_budget_ms is not None:
+                deadline = time.monotonic() + time_budget_ms / 1000.0
+
+            params = self._scan_params(filter_expression, values, page_size, attributes, names)
+            pending = dict(start_keys)
+            items = []
+            pages = self._iter_segment_pages(params, segments, start_keys, deadline)
+            try:
+                for segment, page_items, last_key in pages:
+                    items.extend(page_items)
+                    if last_key:
+                        pending[segment] = last_key
+                    else:
+                        pending.pop(segment, None)
+                    if max_items is not None and len(items) >= max_items:
+                        break
+                    if deadline is not None and time.monotonic() >= deadline:
+                        logger.warning(f"Scan of table {self.table_name} stopped at the time budget")
+                        break
+            finally:
+                pages.close()
+
+            next_cursor = None
+            if pending:
+                next_cursor = encode_cursor({
+                    'total_segments': segments,
+                    'segments': {str(segment): serialize_key(key) for segment, key in pending.items()}
+                })
+
             logger.info(f"Successfully scanned {len(items)} items from table {self.table_name}")
-            
             return {
                 'success': True,
                 'message': 'Scan executed successfully',
                 'data': items,
-                'count': len(items)
+                'count': len(items),
+                'cursor': next_cursor
             }
         except ClientError as e:
             logger.error(f"Error scanning table: {str(e)}")
@@ -212,9 +1119,554 @@ class DynamoDBOperations:
                 'error': e.response['Error']['Code']
             }
 
+    def table_schema(self) -> TableSchema:
+        """
+        Keys and indexes from DescribeTable, refreshed every SCHEMA_CACHE_TTL seconds
+        """
+        now = time.monotonic()
+        if self._schema is None or now - self._schema_loaded >= SCHEMA_CACHE_TTL:
+            description = self.client.describe_table(TableName=self.table_name)['Table']
+            self._schema = TableSchema.from_description(description)
+            self._schema_loaded = now
+        return self._schema
+
+    def plan_filter(self, filter_expression: Optional[str],
+                    names: Optional[Dict[str, str]] = None,
+                    attributes: Optional[List[str]] = None) -> QueryPlan:
+        """
+        Choose between a Query on the table or an index and a full scan
+        """
+        return plan_filter(self.table_schema(), filter_expression, names, attributes)
+
+    def explain(self, filter_expression: Optional[str],
+                names: Optional[Dict[str, str]] = None,
+                attributes: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Show the plan filtered_scan would use and its estimated read units
+        """
+        try:
+            plan = self.plan_filter(filter_expression, names, attributes)
+            return {
+                'success': True,
+                'message': f"Filter runs as a {plan.operation}",
+                'data': plan.as_dict()
+            }
+        except ClientError as e:
+            logger.error(f"Error planning filter: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': e.response['Error']['Code']
+            }
+
+    def filtered_scan(self, filter_expression: Optional[str] = None,
+                      values: Optional[Dict[str, Any]] = None,
+                      segments: int = DEFAULT_SCAN_SEGMENTS,
+                      cursor: Optional[str] = None,
+                      page_size: Optional[int] = None,
+                      max_items: Optional[int] = None,
+                      time_budget_ms: Optional[int] = None,
+                      attributes: Optional[List[str]] = None,
+                      names: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        scan_with_cursor that reads only the matching partition when it can.
+
+        When the filter has an equality on the partition key of the table or
+        of an index, the read becomes a Query with the rest of the filter as
+        FilterExpression, and is billed for the partition instead of the whole
+        table. The response's 'plan' shows which path was taken.
+        """
+        try:
+            plan = self.plan_filter(filter_expression, names, attributes)
+        except ClientError as e:
+            logger.error(f"Error planning filter: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': e.response['Error']['Code']
+            }
+
+        if cursor and ('total_segments' in decode_cursor(cursor)) != (plan.operation == 'scan'):
+            raise ValueError("Pagination cursor does not match the current query plan")
+
+        if plan.operation == 'query':
+            result = self.query_with_cursor(
+                plan.key_condition, values, cursor,
+                page_size=page_size,
+                max_items=max_items,
+                time_budget_ms=time_budget_ms,
+                attributes=attributes,
+                index_name=plan.index_name,
+                filter_expression=plan.filter_expression,
+                names=names
+            )
+        else:
+            result = self.scan_with_cursor(filter_expression, values, segments, cursor, page_size,
+                                           max_items, time_budget_ms, attributes, names)
+        result['plan'] = plan.as_dict()
+        return result
+
+    def _scan_params(self, filter_expression: Optional[str],
+                     values: Optional[Dict[str, Any]],
+                     page_size: Optional[int],
+                     attributes: Optional[List[str]] = None,
+                     names: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Build the Scan request parameters shared by every segment
+        """
+        params = {'TableName': self.table_name, **projection_params(attributes)}
+        if filter_expression:
+            params['FilterExpression'] = filter_expression
+        if values:
+            params['ExpressionAttributeValues'] = self._encode(values)
+        if names:
+            params['ExpressionAttributeNames'] = {**params.get('ExpressionAttributeNames', {}), **names}
+        if page_size:
+            params['Limit'] = page_size
+        return params
+
+    def _iter_segment_pages(self, params: Dict[str, Any], total_segments: int,
+                            start_keys: Dict[int, Optional[Dict[str, Any]]],
+                            deadline: Optional[float] = None
+                            ) -> Iterator[Tuple[int, List[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+        """
+        Yield (segment, items, LastEvaluatedKey) for every page of the given segments
+        """
+        if not start_keys:
+            return
+
+        if total_segments == 1:
+            yield from self._scan_segment(params, 0, 1, start_keys.get(0), deadline=deadline)
+            return
+
+        stop = threading.Event()
+        workers = min(len(start_keys), MAX_SCAN_WORKERS)
+        pages = queue.Queue(maxsize=workers * 2)
+
+        def offer(entry):
+            while not stop.is_set():
+                try:
+                    pages.put(entry, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def worker(segment, start_key):
+            try:
+                for page in self._scan_segment(params, segment, total_segments, start_key, deadline=deadline):
+                    if not offer(page):
+                        return
+                offer(_SEGMENT_DONE)
+            except Exception as e:
+                offer(e)
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            for segment, start_key in start_keys.items():
+                executor.submit(worker, segment, start_key)
+
+            remaining = len(start_keys)
+            while remaining:
+                entry = pages.get()
+                if entry is _SEGMENT_DONE:
+                    remaining -= 1
+                elif isinstance(entry, Exception):
+                    raise entry
+                else:
+                    yield entry
+        finally:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_segment_pages(self, segment: int, total_segments: int,
+                           page_size: Optional[int] = None,
+                           decode: bool = True) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream the pages of one Segment/TotalSegments scan segment, for callers
+        that run their own worker per segment (e.g. table exports).
+
+        With decode=False on the fast path, items stay low-level AttributeValue
+        maps, which skips decoding when they are only written out again.
+        """
+        params = self._scan_params(None, None, page_size)
+        for _, items, _ in self._scan_segment(params, segment, total_segments, None, decode):
+            yield items
+
+    def _scan_segment(self, params: Dict[str, Any], segment: int,
+                      total_segments: int, start_key: Optional[Dict[str, Any]],
+                      decode: bool = True, deadline: Optional[float] = None
+                      ) -> Iterator[Tuple[int, List[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+        """
+        Page through one scan segment by following LastEvaluatedKey.
+
+        When the read bucket would have to wait past `deadline`, the segment
+        stops early; its last LastEvaluatedKey stays in the caller's cursor.
+        """
+        request = dict(params)
+        if total_segments > 1:
+            request['Segment'] = segment
+            request['TotalSegments'] = total_segments
+        bucket = self.limiter.read if self.limiter else None
+
+        while True:
+            if start_key:
+                request['ExclusiveStartKey'] = self._encode(start_key)
+            if bucket:
+                try:
+                    response = bucket.call(self.client.scan, deadline=deadline, **request)
+                except CapacityWaitExceeded as e:
+                    logger.info(f"Scan segment {segment} of table {self.table_name} stopped: {str(e)}")
+                    return
+            else:
+                response = self.client.scan(**request)
+            start_key = self._decode_key(response.get('LastEvaluatedKey'))
+            items = response.get('Items', [])
+            yield segment, self._decode_items(items) if decode else items, start_key
+            if not start_key:
+                return
+
+
+def read_key(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Key of a 'read' payload: either the key itself or {'key': {...}, 'attributes': [...]}
+    """
+    if isinstance(payload.get('key'), dict):
+        return payload['key']
+    return payload
+
+
+def execute_operation(db_ops: DynamoDBOperations, operation: Optional[str],
+                      payload: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Run a single handler operation
+    """
+    if not operation:
+        raise ValueError("Operation not specified in event")
+
+    if operation == 'create':
+        return db_ops.create_item(payload)
+    elif operation == 'read':
+        return db_ops.get_item(read_key(payload), payload.get('attributes') if 'key' in payload else None)
+    elif operation == 'update':
+        key = payload.get('key', {})
+        updates = payload.get('updates', {})
+        return db_ops.update_item(key, updates, payload.get('remove'), payload.get('add'))
+    elif operation == 'delete':
+        return db_ops.delete_item(payload)
+    elif operation == 'query':
+        condition = payload.get('condition')
+        values = payload.get('values', {})
+        return db_ops.query_with_cursor(
+            condition,
+            values,
+            cursor=payload.get('cursor'),
+            page_size=payload.get('limit'),
+            scan_forward=payload.get('forward', True),
+            max_items=payload.get('max_items'),
+            time_budget_ms=remaining_time_budget_ms(context),
+            attributes=payload.get('attributes')
+        )
+    elif operation == 'scan':
+        filter_expr = payload.get('filter')
+        values = payload.get('values')
+        # Filters on a key or index attribute become queries unless the planner is off
+        if filter_expr and payload.get('planner', QUERY_PLANNER):
+            scan = db_ops.filtered_scan
+        else:
+            scan = db_ops.scan_with_cursor
+        return scan(
+            filter_expr,
+            values,
+            segments=payload.get('segments', DEFAULT_SCAN_SEGMENTS),
+            cursor=payload.get('cursor'),
+            page_size=payload.get('page_size'),
+            max_items=payload.get('max_items'),
+            time_budget_ms=remaining_time_budget_ms(context),
+            attributes=payload.get('attributes'),
+            names=payload.get('names')
+        )
+    elif operation == 'explain':
+        return db_ops.explain(payload.get('filter'), payload.get('names'), payload.get('attributes'))
+    elif operation == 'batch_read':
+        keys = payload.get('keys', [])
+        return db_ops.batch_get_items(keys, payload.get('consistent', False))
+    elif operation == 'batch_write':
+        items = payload.get('items', [])
+        return db_ops.batch_write_items(items)
+    elif operation == 'bulk_update':
+        return db_ops.bulk_update(payload.get('updates', []), payload.get('atomic', False))
+    elif operation == 'increment':
+        return db_ops.increment_counter(payload['key'], payload.get('counters', {}), payload.get('shards'))
+    elif operation == 'counters':
+        return db_ops.get_counters(payload['key'], payload.get('shards'), payload.get('consistent', False))
+    elif operation == 'aggregate':
+        return db_ops.get_aggregate(payload.get('dimension', 'table'), payload.get('value', 'all'))
+    elif operation == 'cache_stats':
+        return {
+            'success': True,
+            'message': 'Cache statistics',
+            'data': db_ops.cache.stats() if db_ops.cache else None
+        }
+    elif operation == 'metrics_stats':
+        return {
+            'success': True,
+            'message': 'Metrics of this invocation so far',
+            'data': db_ops.metrics.snapshot() if db_ops.metrics else None
+        }
+    elif operation == 'capacity_stats':
+        return {
+            'success': True,
+            'message': 'Background capacity statistics',
+            'data': db_ops.limiter.stats() if db_ops.limiter else None
+        }
+    else:
+        raise ValueError(f"Unsupported operation: {operation}")
+
+
+def _safe_execute(db_ops: DynamoDBOperations, operation: Optional[str],
+                  payload: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Run one operation of a multi-operation request, isolating its errors
+    """
+    try:
+        return execute_operation(db_ops, operation, payload, context)
+    except Exception as e:
+        logger.error(f"Error processing operation {operation}: {str(e)}")
+        return {
+            'success': False,
+            'message': str(e),
+            'error': 'InternalError'
+        }
+
+
+def _operation_key(operation: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Item or key a keyed operation touches
+    """
+    if operation == 'read':
+        return read_key(payload)
+    if operation == 'update':
+        return payload.get('key', {})
+    return payload
+
+
+def _plan_stages(db_ops: DynamoDBOperations, operations: List[Dict[str, Any]]
+                 ) -> List[List[Tuple[int, Dict[str, Any]]]]:
+    """
+    Split operations into stages whose members can run concurrently.
+
+    An operation starts a new stage when it could observe or overwrite the
+    effect of an earlier operation in the current stage: two operations on
+    the same key where one writes, a query/scan/batch_read after a write, or
+    a write after a query/scan/batch_read. batch_write always runs alone.
+    Stages run in order, so the outcome matches sequential execution.
+    """
+    stages = []
+    current: List[Tuple[int, Dict[str, Any]]] = []
+    read_keys = set()
+    write_keys = set()
+    has_writes = False
+    has_range_reads = False
+    isolated = False
+
+    for index, op in enumerate(operations):
+        operation = op.get('operation')
+        payload = op.get('payload', {})
+
+        if operation in KEYED_OPERATIONS:
+            key = key_fingerprint(_operation_key(operation, payload), tuple(db_ops.key_names))
+            is_write = operation != 'read'
+            conflict = key in write_keys or (is_write and (key in read_keys or has_range_reads))
+        elif operation in RANGE_READ_OPERATIONS:
+            key, is_write = None, False
+            conflict = has_writes
+        else:
+            key, is_write = None, True
+            conflict = bool(current)
+
+        if current and (conflict or isolated):
+            stages.append(current)
+            current = []
+            read_keys, write_keys = set(), set()
+            has_writes = has_range_reads = False
+
+        current.append((index, op))
+        isolated = operation not in KEYED_OPERATIONS and operation not in RANGE_READ_OPERATIONS
+        has_writes = has_writes or is_write
+        if key is None:
+            has_range_reads = has_range_reads or not is_write
+        elif is_write:
+            write_keys.add(key)
+        else:
+            read_keys.add(key)
+
+    if current:
+        stages.append(current)
+    return stages
+
+
+def _merged_reads(db_ops: DynamoDBOperations, reads: List[Tuple[int, Dict[str, Any]]]
+                  ) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Serve several 'read' operations with one batch_get_items call
+    """
+    keys = [read_key(op.get('payload', {})) for _, op in reads]
+    result = db_ops.batch_get_items(keys)
+    if 'data' not in result:
+        return [(index, result) for index, _ in reads]
+
+    key_names = tuple(db_ops.key_names)
+    missing = {key_fingerprint(key, key_names) for key in result['missing']}
+    results = []
+    for (index, _), key, item in zip(reads, keys, result['data']):
+        if item is not None:
+            results.append((index, {
+                'success': True,
+                'message': 'Item retrieved successfully',
+                'data': item
+            }))
+        elif key_fingerprint(key, key_names) in missing:
+            results.append((index, {
+                'success': False,
+                'message': 'Item not found',
+                'error': 'NotFound'
+            }))
+        else:
+            results.append((index, {
+                'success': False,
+                'message': 'Item could not be read, retry later',
+                'error': 'UnprocessedKeys'
+            }))
+    return results
+
+
+def _merged_creates(db_ops: DynamoDBOperations, creates: List[Tuple[int, Dict[str, Any]]]
+                    ) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Serve several 'create' operations with one bulk write. They are online
+    writes like an unmerged 'create', so the background limiter does not pace them.
+
+    DynamoDB rejects a whole BatchWriteItem with ValidationException when
+    one item is invalid (e.g. too large), so the failed items of such a
+    batch are retried one by one and only the invalid ones fail.
+    """
+    items = [op.get('payload', {}) for _, op in creates]
+    result = db_ops.bulk_write(items, paced=False)
+    if 'stats' not in result:
+        return [(index, result) for index, _ in creates]
+
+    key_names = tuple(db_ops.key_names)
+    failed = {key_fingerprint(key, key_names) for key in result['stats']['failed_keys']}
+    retry_single = 'ValidationException' in result['stats']['errors']
+    results = []
+    for (index, _), item in zip(creates, items):
+        if key_fingerprint(item, key_names) in failed and retry_single:
+            results.append((index, db_ops.create_item(item)))
+        elif key_fingerprint(item, key_names) in failed:
+            results.append((index, {
+                'success': False,
+                'message': result['message'],
+                'error': result.get('error', 'InternalError')
+            }))
+        else:
+            results.append((index, {
+                'success': True,
+                'message': 'Item created successfully',
+                'data': item
+            }))
+    return results
+
+
+def _safe_merged(merge: Callable[..., List[Tuple[int, Dict[str, Any]]]], db_ops: DynamoDBOperations,
+                 ops: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Run a merged unit, turning an unexpected error into a result for each of its operations
+    """
+    try:
+        return merge(db_ops, ops)
+    except Exception as e:
+        logger.error(f"Error processing merged operations: {str(e)}")
+        return [(index, {
+            'success': False,
+            'message': str(e),
+            'error': 'InternalError'
+        }) for index, _ in ops]
+
+
+def _has_key(db_ops: DynamoDBOperations, payload: Any) -> bool:
+    """
+    Whether a 'create' payload carries every key attribute, so it can join a batch write
+    """
+    return isinstance(payload, dict) and all(name in payload for name in db_ops.key_names)
+
+
+def _run_stage(db_ops: DynamoDBOperations, stage: List[Tuple[int, Dict[str, Any]]],
+               context: Any) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Run one stage, merging plain reads and creates into batch calls and
+    running everything else concurrently. Creates missing a key attribute
+    run on their own, so DynamoDB's error reaches only them.
+    """
+    reads = [(index, op) for index, op in stage
+             if op.get('operation') == 'read' and not op.get('payload', {}).get('attributes')]
+    creates = [(index, op) for index, op in stage
+               if op.get('operation') == 'create' and _has_key(db_ops, op.get('payload'))]
+    merged = {index for index, _ in reads} if len(reads) > 1 else set()
+    merged |= {index for index, _ in creates} if len(creates) > 1 else set()
+
+    units = []
+    if len(reads) > 1:
+        units.append(lambda: _safe_merged(_merged_reads, db_ops, reads))
+    if len(creates) > 1:
+        units.append(lambda: _safe_merged(_merged_creates, db_ops, creates))
+    for index, op in stage:
+        if index not in merged:
+            units.append(lambda index=index, op=op: [
+                (index, _safe_execute(db_ops, op.get('operation'), op.get('payload', {}), context))
+            ])
+
+    if len(units) == 1:
+        return units[0]()
+    results = []
+    with ThreadPoolExecutor(max_workers=min(len(units), MAX_BATCH_WORKERS)) as executor:
+        for unit_results in executor.map(lambda unit: unit(), units):
+            results.extend(unit_results)
+    return results
+
+
+def execute_operations(db_ops: DynamoDBOperations, operations: List[Dict[str, Any]],
+                       context: Any) -> Dict[str, Any]:
+    """
+    Run a list of operations in one invocation.
+
+    Independent operations run concurrently and plain reads/creates are
+    merged into BatchGetItem/BatchWriteItem calls. Results come back in
+    request order, each with its own success flag.
+    """
+    if len(operations) > MAX_OPERATIONS_PER_INVOCATION:
+        raise ValueError(f"At most {MAX_OPERATIONS_PER_INVOCATION} operations per invocation")
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(operations)
+    for stage in _plan_stages(db_ops, operations):
+        for index, result in _run_stage(db_ops, stage, context):
+            results[index] = {'operation': operations[index].get('operation'), **result}
+
+    failed = sum(1 for result in results if not result['success'])
+    return {
+        'success': failed == 0,
+        'message': f'Executed {len(operations)} operations, {failed} failed',
+        'count': len(operations),
+        'results': results
+    }
+
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
-    Lambda handler for DynamoDB operations
+    Lambda handler for DynamoDB operations.
+
+    The event holds either one 'operation' with its 'payload', or an
+    'operations' list of such objects.
     """
     try:
         # Get table name from environment variable
@@ -222,40 +1674,18 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if not table_name:
             raise ValueError("TABLE_NAME environment variable not set")
         
-        # Initialize DynamoDB operations
-        db_ops = DynamoDBOperations(table_name)
+        # Reuse DynamoDB operations (and their connection pool) across warm invocations
+        db_ops = get_operations(table_name)
         
+        if 'operations' in event:
+            return execute_operations(db_ops, event['operations'], context)
+
         # Get operation type and payload from event
         operation = event.get('operation')
         payload = event.get('payload', {})
         
-        if not operation:
-            raise ValueError("Operation not specified in event")
-        
         # Execute requested operation
-        if operation == 'create':
-            return db_ops.create_item(payload)
-        elif operation == 'read':
-            return db_ops.get_item(payload)
-        elif operation == 'update':
-            key = payload.get('key', {})
-            updates = payload.get('updates', {})
-            return db_ops.update_item(key, updates)
-        elif operation == 'delete':
-            return db_ops.delete_item(payload)
-        elif operation == 'query':
-            condition = payload.get('condition')
-            values = payload.get('values', {})
-            return db_ops.query_items(condition, values)
-        elif operation == 'scan':
-            filter_expr = payload.get('filter')
-            values = payload.get('values')
-            return db_ops.scan_table(filter_expr, values)
-        elif operation == 'batch_write':
-            items = payload.get('items', [])
-            return db_ops.batch_write_items(items)
-        else:
-            raise ValueError(f"Unsupported operation: {operation}")
+        return execute_operation(db_ops, operation, payload, context)
             
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}")
@@ -263,4 +1693,9 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'success': False,
             'message': str(e),
             'error': 'InternalError'
-        } 
\ No newline at end of file
+        }
+    finally:
+        # One EMF flush per invocation instead of one log line per call
+        if operation_metrics is not None:
+            request_id = getattr(context, 'aws_request_id', None)
+            operation_metrics.flush({'RequestId': request_id} if request_id else None)
\ No newline at end of file
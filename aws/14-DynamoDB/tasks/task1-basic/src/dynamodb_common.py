@@ -0,0 +1,167 @@
+import base64
+import json
+import os
+import random
+from botocore.config import Config
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+# Optional endpoint override, e.g. DynamoDB Local
+DYNAMODB_ENDPOINT_URL = os.environ.get('DYNAMODB_ENDPOINT_URL') or None
+
+
+def build_client_config(max_pool_connections: Optional[int] = None,
+                        connect_timeout: Optional[float] = None,
+                        read_timeout: Optional[float] = None,
+                        retry_mode: Optional[str] = None,
+                        max_attempts: Optional[int] = None) -> Config:
+    """
+    Build the botocore Config for DynamoDB clients.
+
+    The connection pool has to be at least as large as the number of parallel
+    scan/batch workers, otherwise they queue for a connection.
+    """
+    return Config(
+        max_pool_connections=max_pool_connections or int(os.environ.get('DDB_MAX_POOL_CONNECTIONS', '50')),
+        tcp_keepalive=True,
+        connect_timeout=connect_timeout or float(os.environ.get('DDB_CONNECT_TIMEOUT', '2')),
+        read_timeout=read_timeout or float(os.environ.get('DDB_READ_TIMEOUT', '10')),
+        retries={
+            'mode': retry_mode or os.environ.get('DDB_RETRY_MODE', 'adaptive'),
+            'max_attempts': max_attempts or int(os.environ.get('DDB_MAX_ATTEMPTS', '10'))
+        }
+    )
+
+
+# Client configuration shared by the DynamoDB handlers
+CLIENT_CONFIG = build_client_config()
+
+# Parallel scan settings
+DEFAULT_SCAN_SEGMENTS = int(os.environ.get('SCAN_SEGMENTS', '4'))
+
+# BatchGetItem settings
+BATCH_GET_CHUNK_SIZE = 100
+BATCH_MAX_RETRIES = 8
+BATCH_BACKOFF_BASE = 0.05
+BATCH_BACKOFF_CAP = 5.0
+
+# TransactWriteItems accepts at most 100 actions
+TRANSACT_CHUNK_SIZE = 100
+# Cancellation reasons that clear up when the transaction is retried
+TRANSACT_RETRYABLE_REASONS = {'ThrottlingError', 'TransactionConflict', 'ProvisionedThroughputExceeded'}
+
+# Sharded counters: items are stored under '<key>#shard#<n>'
+COUNTER_SHARD_SEPARATOR = '#shard#'
+
+# Aggregates maintained by stream_aggregator are stored as '<prefix><dimension>#<value>'
+AGGREGATE_PREFIX = 'agg#'
+
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """
+    Encode a pagination state as an opaque, URL-safe token
+    """
+    raw = json.dumps(state, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """
+    Decode a token produced by encode_cursor
+    """
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except ValueError:
+        raise ValueError("Invalid pagination cursor")
+
+
+@lru_cache(maxsize=256)
+def _compile_projection(attributes: Tuple[str, ...]) -> Tuple[str, Dict[str, str]]:
+    names = {f'#proj{i}': name for i, name in enumerate(attributes)}
+    return ', '.join(names), names
+
+
+def projection_params(attributes: Optional[List[str]]) -> Dict[str, Any]:
+    """
+    ProjectionExpression and ExpressionAttributeNames for a list of attributes.
+
+    Every name goes through a placeholder, so reserved words and special
+    characters are safe. Compiled projections are cached per attribute set.
+    """
+    if not attributes:
+        return {}
+    expression, names = _compile_projection(tuple(sorted(set(attributes))))
+    return {
+        'ProjectionExpression': expression,
+        # Copied so callers can merge in their own names without touching the cache
+        'ExpressionAttributeNames': dict(names)
+    }
+
+
+@lru_cache(maxsize=256)
+def _compile_update(set_fields: Tuple[str, ...], remove_fields: Tuple[str, ...],
+                    add_fields: Tuple[str, ...]) -> Tuple[str, Dict[str, str], Tuple[str, ...]]:
+    names = {}
+    placeholders = []
+    clauses = []
+    index = 0
+    for action, fields in (('SET', set_fields), ('REMOVE', remove_fields), ('ADD', add_fields)):
+        parts = []
+        for field in fields:
+            name = f'#upd{index}'
+            names[name] = field
+            if action == 'REMOVE':
+                parts.append(name)
+            else:
+                placeholder = f':upd{index}'
+                placeholders.append(placeholder)
+                parts.append(f'{name} = {placeholder}' if action == 'SET' else f'{name} {placeholder}')
+            index += 1
+        if parts:
+            clauses.append(f"{action} {', '.join(parts)}")
+    return ' '.join(clauses), names, tuple(placeholders)
+
+
+def update_params(updates: Optional[Dict[str, Any]] = None,
+                  remove: Optional[List[str]] = None,
+                  add: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    UpdateExpression with its names and values for SET, REMOVE and ADD.
+
+    The expression and placeholder names are compiled once per field set and
+    cached, so repeated updates of the same shape only bind new values.
+    ADD takes numbers (increments) or sets (members to add).
+    """
+    updates = updates or {}
+    add = add or {}
+    set_fields = tuple(sorted(updates))
+    add_fields = tuple(sorted(add))
+    expression, names, placeholders = _compile_update(
+        set_fields, tuple(sorted(set(remove or []))), add_fields
+    )
+    if not expression:
+        raise ValueError("Update must SET, REMOVE or ADD at least one attribute")
+
+    values = [updates[field] for field in set_fields] + [add[field] for field in add_fields]
+    params = {
+        'UpdateExpression': expression,
+        # Copied so callers can merge in their own names without touching the cache
+        'ExpressionAttributeNames': dict(names)
+    }
+    if values:
+        params['ExpressionAttributeValues'] = dict(zip(placeholders, values))
+    return params
+
+
+def key_fingerprint(item: Dict[str, Any], key_names: Tuple[str, ...]) -> Tuple[Any, ...]:
+    """
+    Hashable identity of an item or key built from its key attributes
+    """
+    return tuple(item.get(name) for name in key_names)
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Exponential backoff with full jitter for the given retry attempt
+    """
+    return random.uniform(0, min(BATCH_BACKOFF_CAP, BATCH_BACKOFF_BASE * (2 ** attempt)))
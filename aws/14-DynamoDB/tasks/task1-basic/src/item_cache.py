@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class ItemCache:
+    """
+    Bounded in-process item cache with LRU eviction and per-entry TTL.
+
+    Entries are keyed by the item's primary key. The key attribute names are
+    learned from the first key stored, so items passed to writes can be mapped
+    back to their cache entry without a DescribeTable call.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 60.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.key_names: Optional[Tuple[str, ...]] = None
+        self._entries: 'OrderedDict[Tuple[Any, ...], Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _cache_key(self, item: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+        """
+        Build the cache key for a key or a full item
+        """
+        if self.key_names is None:
+            return None
+        try:
+            return tuple(item[name] for name in self.key_names)
+        except KeyError:
+            return None
+
+    def get(self, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Return a copy of the cached item or None on a miss
+        """
+        cache_key = self._cache_key(key)
+        with self._lock:
+            entry = self._entries.get(cache_key) if cache_key is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, item = entry
+            if expires_at <= time.monotonic():
+                del self._entries[cache_key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return dict(item)
+
+    def put(self, key: Dict[str, Any], item: Dict[str, Any]) -> None:
+        """
+        Store an item under its key, evicting the least recently used entry when full
+        """
+        if self.max_size <= 0:
+            return
+        if self.key_names is None:
+            self.key_names = tuple(sorted(key))
+        cache_key = self._cache_key(key)
+        if cache_key is None:
+            return
+        with self._lock:
+            self._entries[cache_key] = (time.monotonic() + self.ttl_seconds, dict(item))
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def refresh(self, item: Dict[str, Any]) -> None:
+        """
+        Replace the cached copy of an item that was just written
+        """
+        if self._cache_key(item) is not None:
+            self.put(item, item)
+
+    def invalidate(self, item: Dict[str, Any]) -> None:
+        """
+        Drop the entry for a key or item, if cached
+        """
+        cache_key = self._cache_key(item)
+        if cache_key is None:
+            return
+        with self._lock:
+            self._entries.pop(cache_key, None)
+
+    def clear(self) -> None:
+        """
+        Drop every entry but keep the counters
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Current size and hit/miss/eviction counters
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,278 @@
+import json
+import logging
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger()
+
+# Latency histogram buckets: upper bounds growing by 20% from 0.5 ms to
+# about 2 minutes, so a percentile read from a bucket is off by at most 20%
+BUCKET_START_MS = 0.5
+BUCKET_GROWTH = 1.2
+BUCKET_COUNT = 70
+BUCKET_BOUNDS = [BUCKET_START_MS * BUCKET_GROWTH ** i for i in range(BUCKET_COUNT)]
+
+READ_OPERATIONS = {'GetItem', 'BatchGetItem', 'Query', 'Scan', 'TransactGetItems'}
+THROTTLE_CODES = {
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+    'TransactionInProgressException'
+}
+
+# Key used to carry the start time, table and operation of a call through
+# botocore's request context
+_CONTEXT_KEY = 'monitoring_call'
+
+
+class LatencyHistogram:
+    """
+    Fixed log-scale histogram; recording is one bisect and an increment
+    """
+
+    def __init__(self):
+        self.counts = [0] * (BUCKET_COUNT + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, millis: float) -> None:
+        self.counts[bisect_left(BUCKET_BOUNDS, millis)] += 1
+        self.total += 1
+        self.sum += millis
+        if millis > self.max:
+            self.max = millis
+
+    def percentile(self, p: float) -> float:
+        """
+        Upper bound of the bucket holding the p-th percentile (the maximum for the overflow bucket)
+        """
+        if not self.total:
+            return 0.0
+        rank = max(1, int(round(p / 100 * self.total)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(BUCKET_BOUNDS[index], self.max) if index < BUCKET_COUNT else self.max
+        return self.max
+
+    def buckets(self) -> Dict[str, int]:
+        """
+        Non-empty buckets keyed by their upper bound in milliseconds
+        """
+        return {
+            (f"{BUCKET_BOUNDS[index]:.3g}" if index < BUCKET_COUNT else 'inf'): count
+            for index, count in enumerate(self.counts) if count
+        }
+
+
+class OperationStats:
+    """
+    Counters and latency of one DynamoDB operation on one table
+    """
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttles = 0
+        self.read_units = 0.0
+        self.write_units = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'retries': self.retries,
+            'throttles': self.throttles,
+            'consumed_rcu': round(self.read_units, 2),
+            'consumed_wcu': round(self.write_units, 2),
+            'latency_ms': {
+                'p50': round(self.latency.percentile(50), 2),
+                'p95': round(self.latency.percentile(95), 2),
+                'p99': round(self.latency.percentile(99), 2),
+                'max': round(self.latency.max, 2),
+                'avg': round(self.latency.sum / self.latency.total, 2) if self.latency.total else 0.0
+            }
+        }
+
+
+def call_table(params: Dict[str, Any]) -> str:
+    """
+    Table a request targets; batch and transaction calls report their first table
+    """
+    if 'TableName' in params:
+        return params['TableName']
+    if params.get('RequestItems'):
+        return next(iter(params['RequestItems']))
+    for action in params.get('TransactItems', []):
+        for request in action.values():
+            return request.get('TableName', 'unknown')
+    return 'unknown'
+
+
+class OperationMetrics:
+    """
+    Per-operation latency, retries, throttles and consumed capacity of
+    instrumented botocore clients.
+
+    instrument() hooks into the client's event system, so every call is
+    measured, whether it comes from DynamoDBOperations, the bulk writer or
+    a boto3 Table sharing the client. Calls only update in-memory
+    counters; flush() writes them as CloudWatch Embedded Metric Format,
+    one JSON document per table and operation, and starts over.
+    """
+
+    def __init__(self, namespace: str = 'DynamoDBOperations'):
+        self.namespace = namespace
+        self._stats: Dict[Tuple[str, str], OperationStats] = {}
+        self._lock = threading.Lock()
+
+    def instrument(self, client: Any) -> None:
+        """
+        Register the metric hooks on a DynamoDB client (again is a no-op)
+        """
+        events = client.meta.events
+        prefix = f"monitoring-{id(self)}"
+        events.register('provide-client-params.dynamodb', self._on_params, unique_id=f"{prefix}-params")
+        events.register('after-call.dynamodb', self._on_response, unique_id=f"{prefix}-response")
+        events.register('after-call-error.dynamodb', self._on_exception, unique_id=f"{prefix}-exception")
+        events.register('needs-retry.dynamodb', self._on_attempt, unique_id=f"{prefix}-attempt")
+
+    def _stats_for(self, table: str, operation: str) -> OperationStats:
+        stats = self._stats.get((table, operation))
+        if stats is None:
+            stats = self._stats[(table, operation)] = OperationStats()
+        return stats
+
+    def _on_params(self, params: Dict[str, Any], model: Any, context: Dict[str, Any], **kwargs: Any) -> None:
+        # Ask for consumed capacity on every operation that can report it
+        if 'ReturnConsumedCapacity' in model.input_shape.members:
+            params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+        context[_CONTEXT_KEY] = (time.perf_counter(), call_table(params), model.name)
+
+    def _on_response(self, parsed: Dict[str, Any], model: Any, context: Dict[str, Any],
+                     http_response: Any, **kwargs: Any) -> None:
+        started, table, _ = context.get(_CONTEXT_KEY, (None, 'unknown', model.name))
+        millis = (time.perf_counter() - started) * 1000 if started else 0.0
+        consumed = parsed.get('ConsumedCapacity') or []
+        if isinstance(consumed, dict):
+            consumed = [consumed]
+
+        with self._lock:
+            stats = self._stats_for(table, model.name)
+            stats.calls += 1
+            stats.latency.record(millis)
+            stats.retries += parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+            if http_response.status_code >= 300:
+                stats.errors += 1
+            for entry in consumed:
+                units = entry.get('CapacityUnits', 0)
+                if 'ReadCapacityUnits' in entry or 'WriteCapacityUnits' in entry:
+                    stats.read_units += entry.get('ReadCapacityUnits', 0)
+                    stats.write_units += entry.get('WriteCapacityUnits', 0)
+                elif model.name in READ_OPERATIONS:
+                    stats.read_units += units
+                else:
+                    stats.write_units += units
+
+    def _on_exception(self, context: Dict[str, Any], **kwargs: Any) -> None:
+        # Connection errors and timeouts never reach after-call
+        started, table, operation = context.get(_CONTEXT_KEY, (None, 'unknown', 'unknown'))
+        with self._lock:
+            stats = self._stats_for(table, operation)
+            stats.calls += 1
+            stats.errors += 1
+            if started:
+                stats.latency.record((time.perf_counter() - started) * 1000)
+
+    def _on_attempt(self, response: Optional[Tuple[Any, Dict[str, Any]]] = None,
+                    request_dict: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        # Called once per attempt, before the retry handler decides; returns
+        # None so retry decisions are left to botocore
+        if response is None:
+            return
+        code = response[1].get('Error', {}).get('Code')
+        if code in THROTTLE_CODES:
+            context = (request_dict or {}).get('context', {})
+            _, table, operation = context.get(_CONTEXT_KEY, (None, 'unknown', 'unknown'))
+            with self._lock:
+                self._stats_for(table, operation).throttles += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Current numbers by 'table/operation'
+        """
+        with self._lock:
+            return {f"{table}/{operation}": stats.as_dict() for (table, operation), stats in self._stats.items()}
+
+    def documents(self, properties: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        EMF documents for the numbers collected so far
+        """
+        timestamp = int(time.time() * 1000)
+        documents = []
+        with self._lock:
+            for (table, operation), stats in self._stats.items():
+                latency = stats.latency
+                documents.append({
+                    '_aws': {
+                        'Timestamp': timestamp,
+                        'CloudWatchMetrics': [{
+                            'Namespace': self.namespace,
+                            'Dimensions': [['TableName', 'Operation']],
+                            'Metrics': [
+                                {'Name': 'Calls', 'Unit': 'Count'},
+                                {'Name': 'Errors', 'Unit': 'Count'},
+                                {'Name': 'Retries', 'Unit': 'Count'},
+                                {'Name': 'Throttles', 'Unit': 'Count'},
+                                {'Name': 'ConsumedRCU', 'Unit': 'Count'},
+                                {'Name': 'ConsumedWCU', 'Unit': 'Count'},
+                                {'Name': 'LatencyP50', 'Unit': 'Milliseconds'},
+                                {'Name': 'LatencyP95', 'Unit': 'Milliseconds'},
+                                {'Name': 'LatencyP99', 'Unit': 'Milliseconds'},
+                                {'Name': 'LatencyMax', 'Unit': 'Milliseconds'}
+                            ]
+                        }]
+                    },
+                    'TableName': table,
+                    'Operation': operation,
+                    'Calls': stats.calls,
+                    'Errors': stats.errors,
+                    'Retries': stats.retries,
+                    'Throttles': stats.throttles,
+                    'ConsumedRCU': round(stats.read_units, 2),
+                    'ConsumedWCU': round(stats.write_units, 2),
+                    'LatencyP50': round(latency.percentile(50), 3),
+                    'LatencyP95': round(latency.percentile(95), 3),
+                    'LatencyP99': round(latency.percentile(99), 3),
+                    'LatencyMax': round(latency.max, 3),
+                    # Not a metric: kept in the log line for Logs Insights queries
+                    'LatencyBuckets': latency.buckets(),
+                    **(properties or {})
+                })
+        return documents
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
+
+    def flush(self, properties: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Write the collected numbers as EMF and reset them. Returns the number of documents.
+
+        EMF lines must be bare JSON, so they go to stdout rather than through
+        the logger, whose Lambda format adds a prefix.
+        """
+        documents = self.documents(properties)
+        self.reset()
+        if documents:
+            sys.stdout.write(''.join(json.dumps(document, separators=(',', ':')) + '\n'
+                                     for document in documents))
+            sys.stdout.flush()
+        return len(documents)
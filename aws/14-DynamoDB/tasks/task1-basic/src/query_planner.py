@@ -0,0 +1,261 @@
+import math
+import re
+from typing import Any, Dict, List, Optional
+
+# Key conditions accept these comparisons on the sort key; the partition key needs '='
+RANGE_KEY_OPERATORS = {'=', '<', '<=', '>', '>=', 'BETWEEN', 'begins_with'}
+
+# Heuristic share of an index matched by a partition key equality, and the
+# further share kept by a sort key condition. DescribeTable has no
+# per-partition statistics, so query estimates are rough by nature.
+PARTITION_SELECTIVITY = 0.01
+RANGE_SELECTIVITY = 0.25
+
+# Used when DescribeTable has no size statistics yet (new tables)
+DEFAULT_ITEM_SIZE = 1024
+
+_COMPARISON = re.compile(r'^([#\w]+)\s*(<=|>=|<>|=|<|>)\s*(:\w+)$')
+_BETWEEN = re.compile(r'^([#\w]+)\s+BETWEEN\s+(:\w+)\s+AND\s+(:\w+)$', re.IGNORECASE)
+_BEGINS_WITH = re.compile(r'^begins_with\s*\(\s*([#\w]+)\s*,\s*(:\w+)\s*\)$', re.IGNORECASE)
+_AND = re.compile(r'\s+AND\s+', re.IGNORECASE)
+_UNSUPPORTED = re.compile(r'\b(OR|NOT)\b|\(', re.IGNORECASE)
+_FUNCTION_CALL = re.compile(r'\w+\s*\([^()]*\)')
+
+
+class IndexSchema:
+    """
+    Key attributes, projection and size statistics of the table or one of its indexes
+    """
+
+    def __init__(self, name: Optional[str], hash_key: str, range_key: Optional[str],
+                 projection: str = 'ALL', projected: Optional[List[str]] = None,
+                 item_count: int = 0, size_bytes: int = 0):
+        self.name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.projection = projection
+        self.projected = set(projected or [])
+        self.item_count = item_count
+        self.size_bytes = size_bytes
+
+    @classmethod
+    def from_description(cls, description: Dict[str, Any], name: Optional[str] = None) -> 'IndexSchema':
+        keys = {key['KeyType']: key['AttributeName'] for key in description['KeySchema']}
+        projection = description.get('Projection', {})
+        return cls(
+            name,
+            keys['HASH'],
+            keys.get('RANGE'),
+            projection.get('ProjectionType', 'ALL'),
+            projection.get('NonKeyAttributes'),
+            description.get('ItemCount', 0),
+            description.get('TableSizeBytes', description.get('IndexSizeBytes', 0))
+        )
+
+    @property
+    def item_size(self) -> float:
+        return self.size_bytes / self.item_count if self.item_count else DEFAULT_ITEM_SIZE
+
+    def covers(self, attributes: Optional[List[str]], table_keys: List[str]) -> bool:
+        """
+        Whether items read from this index carry every attribute needed.
+        None means whole items are needed.
+        """
+        if self.projection == 'ALL':
+            return True
+        if attributes is None:
+            return False
+        available = self.projected | set(table_keys) | {self.hash_key, self.range_key}
+        return set(attributes) <= available
+
+
+class TableSchema:
+    """
+    Primary key and secondary indexes of a table, parsed from DescribeTable
+    """
+
+    def __init__(self, table: IndexSchema, indexes: List[IndexSchema]):
+        self.table = table
+        self.indexes = indexes
+
+    @classmethod
+    def from_description(cls, description: Dict[str, Any]) -> 'TableSchema':
+        indexes = [
+            IndexSchema.from_description(index, index['IndexName'])
+            for kind in ('GlobalSecondaryIndexes', 'LocalSecondaryIndexes')
+            for index in description.get(kind, [])
+            # Indexes still backfilling cannot be queried
+            if index.get('IndexStatus', 'ACTIVE') == 'ACTIVE'
+        ]
+        return cls(IndexSchema.from_description(description), indexes)
+
+    @property
+    def key_names(self) -> List[str]:
+        return [name for name in (self.table.hash_key, self.table.range_key) if name]
+
+
+class Condition:
+    """
+    One conjunct of a filter expression
+    """
+
+    def __init__(self, text: str, attribute: Optional[str] = None,
+                 operator: Optional[str] = None, values: Optional[List[str]] = None):
+        self.text = text
+        self.attribute = attribute
+        self.operator = operator
+        self.values = values or []
+
+
+def parse_filter(expression: str, names: Optional[Dict[str, str]] = None) -> Optional[List[Condition]]:
+    """
+    Split an AND-only filter into conditions, resolving '#name' placeholders.
+
+    Conditions that cannot become key conditions are kept with only their
+    text. Returns None for filters with OR, NOT or parentheses, which the
+    planner leaves to a scan.
+    """
+    names = names or {}
+    # Function calls such as begins_with(...) or contains(...) are fine
+    if _UNSUPPORTED.search(_FUNCTION_CALL.sub('', expression)):
+        return None
+
+    parts = []
+    for part in _AND.split(expression.strip()):
+        # Rejoin 'x BETWEEN :a' with the ':b' split off at its AND
+        if parts and re.search(r'\bBETWEEN\s+:\w+$', parts[-1], re.IGNORECASE):
+            parts[-1] = f"{parts[-1]} AND {part}"
+        else:
+            parts.append(part)
+
+    conditions = []
+    for part in parts:
+        match = _COMPARISON.match(part)
+        if match and match.group(2) != '<>':
+            attribute, operator, value = match.groups()
+            conditions.append(Condition(part, names.get(attribute, attribute), operator, [value]))
+            continue
+        match = _BETWEEN.match(part)
+        if match:
+            attribute, low, high = match.groups()
+            conditions.append(Condition(part, names.get(attribute, attribute), 'BETWEEN', [low, high]))
+            continue
+        match = _BEGINS_WITH.match(part)
+        if match:
+            attribute, value = match.groups()
+            conditions.append(Condition(part, names.get(attribute, attribute), 'begins_with', [value]))
+            continue
+        conditions.append(Condition(part))
+    return conditions
+
+
+def scan_read_units(index: IndexSchema, consistent_read: bool = False) -> float:
+    """
+    Read units to scan a whole table or index
+    """
+    units = max(1, math.ceil(index.size_bytes / 4096))
+    return units if consistent_read else units / 2
+
+
+def query_read_units(index: IndexSchema, range_condition: bool, exact: bool,
+                     consistent_read: bool = False) -> float:
+    """
+    Estimated read units for a query on one partition of the table or an index
+    """
+    if exact:
+        matched = 1
+    else:
+        matched = index.item_count * PARTITION_SELECTIVITY * (RANGE_SELECTIVITY if range_condition else 1)
+    units = max(1, math.ceil(matched * index.item_size / 4096))
+    return units if consistent_read else units / 2
+
+
+class QueryPlan:
+    """
+    How a filtered read is executed: a Query on the table or an index, or a scan
+    """
+
+    def __init__(self, operation: str, index_name: Optional[str] = None,
+                 key_condition: Optional[str] = None,
+                 filter_expression: Optional[str] = None,
+                 estimated_rcu: float = 0.0, scan_rcu: float = 0.0,
+                 reason: str = ''):
+        self.operation = operation
+        self.index_name = index_name
+        self.key_condition = key_condition
+        self.filter_expression = filter_expression
+        self.estimated_rcu = estimated_rcu
+        self.scan_rcu = scan_rcu
+        self.reason = reason
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'operation': self.operation,
+            'index': self.index_name,
+            'key_condition': self.key_condition,
+            'filter': self.filter_expression,
+            'estimated_rcu': round(self.estimated_rcu, 1),
+            'scan_rcu': round(self.scan_rcu, 1),
+            'reason': self.reason
+        }
+
+
+def plan_filter(schema: TableSchema, filter_expression: Optional[str],
+                names: Optional[Dict[str, str]] = None,
+                attributes: Optional[List[str]] = None) -> QueryPlan:
+    """
+    Pick the cheapest way to read the items matching a filter.
+
+    A Query is chosen when the filter has an equality on the partition key of
+    the table or of an index that projects the needed attributes; a sort key
+    condition joins the key condition and every other conjunct stays a
+    FilterExpression. Otherwise the plan is a parallel scan.
+
+    Secondary indexes are sparse: an item without the index sort key is not
+    in the index. An index with a sort key is therefore only used when the
+    filter also constrains that sort key, which excludes those items anyway.
+    """
+    scan_rcu = scan_read_units(schema.table)
+    if not filter_expression:
+        return QueryPlan('scan', filter_expression=filter_expression, estimated_rcu=scan_rcu,
+                         scan_rcu=scan_rcu, reason='no filter')
+
+    conditions = parse_filter(filter_expression, names)
+    if conditions is None:
+        return QueryPlan('scan', filter_expression=filter_expression, estimated_rcu=scan_rcu,
+                         scan_rcu=scan_rcu, reason='filter uses OR, NOT or parentheses')
+
+    best = None
+    for index in [schema.table] + schema.indexes:
+        if index.name and not index.covers(attributes, schema.key_names):
+            continue
+        partition = next((c for c in conditions
+                          if c.attribute == index.hash_key and c.operator == '='), None)
+        if partition is None:
+            continue
+        sort = next((c for c in conditions
+                     if index.range_key and c.attribute == index.range_key
+                     and c.operator in RANGE_KEY_OPERATORS), None)
+        if index.name and index.range_key and sort is None:
+            continue
+        exact = index.name is None and (index.range_key is None or (sort is not None and sort.operator == '='))
+        rank = (exact, sort is not None, index.name is None)
+        if best is None or rank > best[0]:
+            best = (rank, index, partition, sort, exact)
+
+    if best is None:
+        return QueryPlan('scan', filter_expression=filter_expression, estimated_rcu=scan_rcu,
+                         scan_rcu=scan_rcu, reason='no key or index matches an equality in the filter')
+
+    _, index, partition, sort, exact = best
+    key_conditions = [condition for condition in (partition, sort) if condition is not None]
+    residual = [condition.text for condition in conditions if condition not in key_conditions]
+    return QueryPlan(
+        'query',
+        index_name=index.name,
+        key_condition=' AND '.join(condition.text for condition in key_conditions),
+        filter_expression=' AND '.join(residual) or None,
+        estimated_rcu=query_read_units(index, sort is not None, exact),
+        scan_rcu=scan_rcu,
+        reason=f"equality on {'index ' + index.name if index.name else 'table'} partition key {index.hash_key}"
+    )
@@ -0,0 +1,258 @@
+import boto3
+import hashlib
+import logging
+import os
+import time
+from decimal import Decimal
+from botocore.exceptions import ClientError
+from typing import Any, Dict, List, Optional, Tuple
+
+from attribute_values import encode_item, make_item_decoder
+from dynamodb_common import (
+    AGGREGATE_PREFIX,
+    BATCH_MAX_RETRIES,
+    CLIENT_CONFIG,
+    COUNTER_SHARD_SEPARATOR,
+    DYNAMODB_ENDPOINT_URL,
+    TRANSACT_CHUNK_SIZE,
+    TRANSACT_RETRYABLE_REASONS,
+    backoff_delay,
+    update_params
+)
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Aggregate items go to the table the stream comes from unless AGGREGATE_TABLE is set
+AGGREGATE_TABLE = os.environ.get('AGGREGATE_TABLE') or os.environ.get('TABLE_NAME')
+# Attributes to aggregate by (besides the table-wide 'table#all') and
+# numeric attributes to sum, both comma separated
+AGGREGATE_GROUP_BY = [name for name in os.environ.get('AGGREGATE_GROUP_BY', '').split(',') if name]
+AGGREGATE_SUM_ATTRIBUTES = [name for name in os.environ.get('AGGREGATE_SUM_ATTRIBUTES', '').split(',') if name]
+
+client = boto3.client('dynamodb', config=CLIENT_CONFIG, endpoint_url=DYNAMODB_ENDPOINT_URL)
+_decode_image = make_item_decoder('decimal')
+_aggregate_key_name: Optional[str] = None
+
+
+def aggregate_key(dimension: str, value: Any) -> str:
+    """
+    Partition key value of the aggregate item for one dimension value
+    """
+    return f"{AGGREGATE_PREFIX}{dimension}#{value}"
+
+
+def is_derived_item(keys: Dict[str, Any]) -> bool:
+    """
+    Whether a record is about an aggregate or counter shard item, which must
+    not be aggregated again (the aggregates may live in the source table)
+    """
+    for value in keys.values():
+        if isinstance(value, str) and (value.startswith(AGGREGATE_PREFIX) or COUNTER_SHARD_SEPARATOR in value):
+            return True
+    return False
+
+
+class AggregateDelta:
+    """
+    Coalesced change to one aggregate item
+    """
+
+    def __init__(self, dimension: str, value: Any):
+        self.dimension = dimension
+        self.value = value
+        self.count = 0
+        self.sums: Dict[str, Decimal] = {}
+        self.last_seen: Optional[int] = None
+
+    def apply(self, image: Dict[str, Any], sign: int) -> None:
+        self.count += sign
+        for name in AGGREGATE_SUM_ATTRIBUTES:
+            amount = image.get(name)
+            if isinstance(amount, Decimal):
+                self.sums[name] = self.sums.get(name, Decimal(0)) + sign * amount
+
+    def seen(self, timestamp: Optional[int]) -> None:
+        if timestamp is not None and (self.last_seen is None or timestamp > self.last_seen):
+            self.last_seen = timestamp
+
+    def update_request(self, table_name: str, key_name: str) -> Dict[str, Any]:
+        """
+        One ADD update carrying the whole delta, except last_seen (see last_seen_request)
+        """
+        add = {f"sum_{name}": amount for name, amount in self.sums.items() if amount}
+        if self.count:
+            add['count'] = self.count
+        params = update_params({'dimension': self.dimension, 'value': self.value}, add=add)
+        params['ExpressionAttributeValues'] = encode_item(params['ExpressionAttributeValues'])
+        params['TableName'] = table_name
+        params['Key'] = encode_item({key_name: aggregate_key(self.dimension, self.value)})
+        return params
+
+    def last_seen_request(self, table_name: str, key_name: str) -> Dict[str, Any]:
+        """
+        Update moving last_seen forward only. Shard consumers run
+        concurrently, so an older batch may be applied after a newer one.
+        """
+        return {
+            'TableName': table_name,
+            'Key': encode_item({key_name: aggregate_key(self.dimension, self.value)}),
+            'UpdateExpression': 'SET #last_seen = :ts',
+            'ConditionExpression': 'attribute_not_exists(#last_seen) OR #last_seen < :ts',
+            'ExpressionAttributeNames': {'#last_seen': 'last_seen'},
+            'ExpressionAttributeValues': encode_item({':ts': self.last_seen})
+        }
+
+
+def record_groups(image: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """
+    Aggregates an item image contributes to
+    """
+    groups = [('table', 'all')]
+    for name in AGGREGATE_GROUP_BY:
+        # Only scalar values name a group; maps, lists and sets are skipped
+        if isinstance(image.get(name), (str, Decimal, bool)):
+            groups.append((name, image[name]))
+    return groups
+
+
+def record_changes(record: Dict[str, Any]) -> List[Tuple[Tuple[str, Any], Dict[str, Any], int]]:
+    """
+    (group, image, sign) contributions of one stream record. A MODIFY removes
+    the old image and adds the new one, so changed values and items moving
+    between groups are both accounted for.
+    """
+    stream = record['dynamodb']
+    changes = []
+    if record['eventName'] in ('MODIFY', 'REMOVE') and 'OldImage' in stream:
+        old = _decode_image(stream['OldImage'])
+        changes.extend((group, old, -1) for group in record_groups(old))
+    if record['eventName'] in ('INSERT', 'MODIFY') and 'NewImage' in stream:
+        new = _decode_image(stream['NewImage'])
+        changes.extend((group, new, 1) for group in record_groups(new))
+    return changes
+
+
+def plan_segments(records: List[Dict[str, Any]]
+                  ) -> List[Tuple[int, int, Dict[Tuple[str, Any], AggregateDelta]]]:
+    """
+    Coalesce records, in order, into segments touching at most
+    TRANSACT_CHUNK_SIZE aggregates. Returns (first, end, deltas) where
+    records[first:end] are the records of the segment.
+    """
+    segments = []
+    start = 0
+    deltas: Dict[Tuple[str, Any], AggregateDelta] = {}
+
+    for index, record in enumerate(records):
+        stream = record['dynamodb']
+        if is_derived_item(_decode_image(stream.get('Keys', {}))):
+            continue
+        changes = record_changes(record)
+        new_groups = {group for group, _, _ in changes if group not in deltas}
+        if deltas and len(deltas) + len(new_groups) > TRANSACT_CHUNK_SIZE:
+            segments.append((start, index, deltas))
+            start = index
+            deltas = {}
+        timestamp = stream.get('ApproximateCreationDateTime')
+        for group, image, sign in changes:
+            delta = deltas.get(group)
+            if delta is None:
+                delta = deltas[group] = AggregateDelta(*group)
+            delta.apply(image, sign)
+            delta.seen(int(timestamp) if timestamp is not None else None)
+
+    if deltas:
+        segments.append((start, len(records), deltas))
+    return segments
+
+
+def aggregate_key_name() -> str:
+    """
+    Partition key name of the aggregate table, loaded once per container
+    """
+    global _aggregate_key_name
+    if _aggregate_key_name is None:
+        description = client.describe_table(TableName=AGGREGATE_TABLE)['Table']
+        _aggregate_key_name = next(
+            key['AttributeName'] for key in description['KeySchema'] if key['KeyType'] == 'HASH'
+        )
+    return _aggregate_key_name
+
+
+def apply_segment(records: List[Dict[str, Any]], deltas: Dict[Tuple[str, Any], AggregateDelta]) -> None:
+    """
+    Apply the deltas of one segment's records in a single transaction.
+
+    The ClientRequestToken is derived from the first and last SequenceNumber
+    of the segment. Segments are planned greedily from the first record of
+    the batch, so when Lambda redelivers the same batch after a transaction
+    succeeded (e.g. the invocation timed out), each segment covers the same
+    records again and DynamoDB ignores the repeated transaction. This only
+    holds within DynamoDB's 10 minute idempotency window and for segments
+    covering exactly the same records: a segment cut short by a smaller
+    redelivered batch (BisectBatchOnFunctionError) has another token and is
+    counted again. last_seen is advanced afterwards by separate conditional
+    updates, so a newer timestamp already stored never cancels the counts.
+    """
+    key_name = aggregate_key_name()
+    actions = [{'Update': delta.update_request(AGGREGATE_TABLE, key_name)} for delta in deltas.values()]
+    sequence_range = f"{records[0]['dynamodb']['SequenceNumber']}-{records[-1]['dynamodb']['SequenceNumber']}"
+    token = hashlib.sha256(sequence_range.encode('utf-8')).hexdigest()[:36]
+
+    for attempt in range(BATCH_MAX_RETRIES + 1):
+        try:
+            client.transact_write_items(TransactItems=actions, ClientRequestToken=token)
+            break
+        except ClientError as e:
+            reasons = {
+                reason.get('Code') for reason in e.response.get('CancellationReasons', [])
+            } - {'None', None}
+            retryable = (e.response['Error']['Code'] == 'TransactionCanceledException'
+                         and reasons and reasons <= TRANSACT_RETRYABLE_REASONS)
+            if not retryable or attempt == BATCH_MAX_RETRIES:
+                raise
+            time.sleep(backoff_delay(attempt))
+
+    for delta in deltas.values():
+        if delta.last_seen is None:
+            continue
+        try:
+            client.update_item(**delta.last_seen_request(AGGREGATE_TABLE, key_name))
+        except ClientError as e:
+            # A newer timestamp is already stored; other errors only leave
+            # last_seen behind, which must not fail the applied counts
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                logger.warning(f"Could not update last_seen of {delta.dimension}#{delta.value}: {str(e)}")
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    DynamoDB Streams handler maintaining aggregate items.
+
+    Records are applied in order, one transaction per segment. When a
+    segment fails, its first record is reported in batchItemFailures:
+    earlier segments are already applied and Lambda retries from that record
+    on, so no delta is lost. Deltas are not applied twice when the failed
+    segment is retried. A whole batch redelivered after a timeout is only
+    deduplicated as far as apply_segment describes.
+    """
+    records = event.get('Records', [])
+    logger.info(f"Aggregating {len(records)} stream records")
+
+    applied = 0
+    for start, end, deltas in plan_segments(records):
+        try:
+            apply_segment(records[start:end], deltas)
+            applied += len(deltas)
+        except Exception as e:
+            logger.error(f"Error applying aggregates for records {start}-{end - 1}: {str(e)}")
+            return {
+                'batchItemFailures': [
+                    {'itemIdentifier': records[start]['dynamodb']['SequenceNumber']}
+                ]
+            }
+
+    logger.info(f"Applied {applied} aggregate updates")
+    return {'batchItemFailures': []}
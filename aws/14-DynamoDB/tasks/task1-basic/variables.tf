@@ -50,6 +50,25 @@ variable "write_capacity" {
   default     = 5
 }
 
+variable "background_capacity_fraction" {
+  description = "Share of provisioned RCU/WCU that Lambda scans and bulk writes may consume (0 disables the limiter)"
+  type        = number
+  default     = 0.5
+}
+
+variable "global_secondary_indexes" {
+  description = "Global secondary indexes; the Lambda query planner routes filters on their keys to Query instead of Scan"
+  type = list(object({
+    name            = string
+    hash_key        = string
+    hash_key_type   = string
+    range_key       = optional(string)
+    range_key_type  = optional(string)
+    projection_type = optional(string, "ALL")
+  }))
+  default = []
+}
+
 # Auto Scaling Variables
 variable "enable_autoscaling" {
   description = "Enable DynamoDB auto scaling"
@@ -132,6 +151,36 @@ variable "enable_lambda_trigger" {
   default     = false
 }
 
+variable "enable_operation_metrics" {
+  description = "Publish per-operation latency, retry, throttle and capacity metrics as CloudWatch EMF"
+  type        = bool
+  default     = true
+}
+
+variable "metrics_namespace" {
+  description = "CloudWatch namespace of the per-operation metrics"
+  type        = string
+  default     = "DynamoDBOperations"
+}
+
+variable "enable_stream_aggregates" {
+  description = "Enable the table stream and the Lambda consumer that maintains aggregate items"
+  type        = bool
+  default     = false
+}
+
+variable "aggregate_group_by" {
+  description = "Comma-separated attributes to keep per-value aggregates for (a table-wide aggregate is always kept)"
+  type        = string
+  default     = ""
+}
+
+variable "aggregate_sum_attributes" {
+  description = "Comma-separated numeric attributes summed in every aggregate"
+  type        = string
+  default     = ""
+}
+
 variable "lambda_function_name" {
   description = "Name of the Lambda function to trigger"
   type        = string
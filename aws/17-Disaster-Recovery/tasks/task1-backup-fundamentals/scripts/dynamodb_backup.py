@@ -0,0 +1,276 @@
+"""
+Export a DynamoDB table to compressed NDJSON shards and import it back.
+
+Export runs one Segment/TotalSegments scan worker per segment and streams
+each segment into its own gzip or zstd shards, rotated every --shard-items
+items, so memory stays flat and compression runs in parallel. Every line is
+{"Item": <DynamoDB JSON>}, the same layout as DynamoDB's native S3 export,
+with binary values base64-encoded. A manifest.json lists the shards and
+their item counts.
+
+Import streams the shards back through the parallel batch writer of
+crud_operations.DynamoDBOperations and reports throughput and ETA.
+
+Usage:
+    python scripts/dynamodb_backup.py export --table Users --output backup/ --segments 16
+    python scripts/dynamodb_backup.py import --table Users --input backup/ --workers 32
+"""
+import argparse
+import base64
+import gzip
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+# DynamoDBOperations lives with the DynamoDB module
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       '..', '..', '..', '..', '14-DynamoDB', 'tasks', 'task1-basic', 'src')
+
+MANIFEST_NAME = 'manifest.json'
+EXTENSIONS = {'gzip': '.ndjson.gz', 'zstd': '.ndjson.zst'}
+PROGRESS_INTERVAL = 5.0
+
+logger = logging.getLogger()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--endpoint-url', help='DynamoDB endpoint, e.g. DynamoDB Local')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help='Write the table to compressed NDJSON shards')
+    export.add_argument('--table', required=True)
+    export.add_argument('--output', required=True, help='Directory for shards and manifest')
+    export.add_argument('--segments', type=int, default=8, help='Parallel scan segments')
+    export.add_argument('--page-size', type=int, help='Scan page size (Limit)')
+    export.add_argument('--shard-items', type=int, default=100000, help='Items per shard file')
+    export.add_argument('--compression', choices=sorted(EXTENSIONS), default='gzip')
+    export.add_argument('--level', type=int, help='Compression level (default: gzip 6, zstd 3)')
+
+    restore = commands.add_parser('import', help='Load shards listed in a manifest into a table')
+    restore.add_argument('--table', help='Target table (default: the exported table)')
+    restore.add_argument('--input', required=True, help='Directory holding manifest.json')
+    restore.add_argument('--workers', type=int, default=16, help='Parallel batch writers')
+    return parser.parse_args()
+
+
+def open_shard(path: str, compression: str, mode: str, level: Optional[int] = None):
+    """
+    Open a shard as text for 'r' or 'w'
+    """
+    if compression == 'gzip':
+        return gzip.open(path, mode + 't', encoding='utf-8', compresslevel=level or 6)
+    try:
+        import zstandard
+    except ImportError:
+        raise SystemExit("zstd compression needs the 'zstandard' package: pip install zstandard")
+    if mode == 'w':
+        return zstandard.open(path, 'wt', encoding='utf-8', cctx=zstandard.ZstdCompressor(level=level or 3))
+    return zstandard.open(path, 'rt', encoding='utf-8')
+
+
+def binary_to_json(value: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Base64-encode B/BS values inside a low-level attribute value
+    """
+    for tag, data in value.items():
+        if tag == 'B':
+            return {'B': base64.b64encode(data).decode('ascii')}
+        if tag == 'BS':
+            return {'BS': [base64.b64encode(member).decode('ascii') for member in data]}
+        if tag == 'M':
+            return {'M': {name: binary_to_json(nested) for name, nested in data.items()}}
+        if tag == 'L':
+            return {'L': [binary_to_json(nested) for nested in data]}
+        return value
+    return value
+
+
+def binary_from_json(value: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reverse binary_to_json
+    """
+    for tag, data in value.items():
+        if tag == 'B':
+            return {'B': base64.b64decode(data)}
+        if tag == 'BS':
+            return {'BS': [base64.b64decode(member) for member in data]}
+        if tag == 'M':
+            return {'M': {name: binary_from_json(nested) for name, nested in data.items()}}
+        if tag == 'L':
+            return {'L': [binary_from_json(nested) for nested in data]}
+        return value
+    return value
+
+
+class Progress:
+    """
+    Thread-safe item counter that logs throughput and, when the total is known, an ETA
+    """
+
+    def __init__(self, label: str, total: Optional[int] = None):
+        self.label = label
+        self.total = total
+        self.count = 0
+        self.started = time.monotonic()
+        self._reported = self.started
+        self._lock = threading.Lock()
+
+    def add(self, count: int) -> None:
+        with self._lock:
+            self.count += count
+            now = time.monotonic()
+            if now - self._reported < PROGRESS_INTERVAL:
+                return
+            self._reported = now
+        self.report()
+
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def report(self) -> None:
+        rate = self.rate()
+        message = f"{self.label}: {self.count} items, {rate:,.0f} items/s"
+        if self.total:
+            remaining = max(0, self.total - self.count)
+            eta = remaining / rate if rate > 0 else float('inf')
+            message += f", {100 * self.count / self.total:.1f}% done, ETA {eta:,.0f}s"
+        logger.info(message)
+
+
+def export_segment(ops: Any, segment: int, args: argparse.Namespace, progress: Progress) -> List[Dict[str, Any]]:
+    """
+    Stream one scan segment into rotating shard files and return their manifest entries
+    """
+    shards = []
+    shard = None
+    entry = None
+    try:
+        for items in ops.iter_segment_pages(segment, args.segments, args.page_size, decode=False):
+            for item in items:
+                if shard is None or entry['items'] >= args.shard_items:
+                    if shard is not None:
+                        shard.close()
+                    name = f"segment-{segment:04d}-{len(shards):05d}{EXTENSIONS[args.compression]}"
+                    shard = open_shard(os.path.join(args.output, name), args.compression, 'w', args.level)
+                    entry = {'file': name, 'segment': segment, 'items': 0}
+                    shards.append(entry)
+                shard.write(json.dumps({'Item': binary_to_json({'M': item})['M']}, separators=(',', ':')))
+                shard.write('\n')
+                entry['items'] += 1
+            progress.add(len(items))
+    finally:
+        if shard is not None:
+            shard.close()
+
+    for entry in shards:
+        entry['bytes'] = os.path.getsize(os.path.join(args.output, entry['file']))
+    return shards
+
+
+def export_table(ops: Any, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Export every segment in parallel and write the manifest
+    """
+    os.makedirs(args.output, exist_ok=True)
+    progress = Progress(f"Exporting {args.table}")
+    started = datetime.now(timezone.utc)
+
+    with ThreadPoolExecutor(max_workers=args.segments) as executor:
+        results = list(executor.map(
+            lambda segment: export_segment(ops, segment, args, progress), range(args.segments)
+        ))
+
+    shards = [entry for segment_shards in results for entry in segment_shards]
+    manifest = {
+        'table': args.table,
+        'key_schema': list(ops.key_names),
+        'format': 'dynamodb-json',
+        'compression': args.compression,
+        'segments': args.segments,
+        'item_count': sum(entry['items'] for entry in shards),
+        'bytes': sum(entry['bytes'] for entry in shards),
+        'started_at': started.isoformat(),
+        'finished_at': datetime.now(timezone.utc).isoformat(),
+        'shards': shards
+    }
+    with open(os.path.join(args.output, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    progress.report()
+    logger.info(f"Exported {manifest['item_count']} items to {len(shards)} shards "
+                f"({manifest['bytes']} bytes) in {args.output}")
+    return manifest
+
+
+def read_shards(input_dir: str, manifest: Dict[str, Any], progress: Progress,
+                decode_item: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the items of every shard in the manifest, one line at a time
+    """
+    for entry in manifest['shards']:
+        with open_shard(os.path.join(input_dir, entry['file']), manifest['compression'], 'r') as shard:
+            count = 0
+            for line in shard:
+                if not line.strip():
+                    continue
+                item = json.loads(line)['Item']
+                yield decode_item(binary_from_json({'M': item})['M'])
+                count += 1
+                if count == 1000:
+                    progress.add(count)
+                    count = 0
+            progress.add(count)
+
+
+def import_table(ops: Any, args: argparse.Namespace, manifest: Dict[str, Any],
+                 decode_item: Any) -> Dict[str, Any]:
+    """
+    Write every shard back through the parallel bulk writer
+    """
+    progress = Progress(f"Importing into {ops.table_name}", manifest.get('item_count'))
+    result = ops.bulk_write(read_shards(args.input, manifest, progress, decode_item), workers=args.workers)
+    progress.report()
+    if result['success']:
+        logger.info(f"Imported {result['count']} of {manifest.get('item_count')} items "
+                    f"({result['stats']['items_per_second']} items/s)")
+    else:
+        logger.error(f"Import finished with errors: {result['message']}")
+    return result
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    if args.endpoint_url:
+        os.environ['DYNAMODB_ENDPOINT_URL'] = args.endpoint_url
+    sys.path.insert(0, SRC_DIR)
+    from attribute_values import make_item_decoder
+    from crud_operations import DynamoDBOperations, build_client_config
+
+    if args.command == 'export':
+        # The fast path client hands items over without type conversion
+        config = build_client_config(max_pool_connections=max(args.segments, 10))
+        ops = DynamoDBOperations(args.table, config=config, fast_path=True, number_mode='decimal')
+        export_table(ops, args)
+        return
+
+    with open(os.path.join(args.input, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    config = build_client_config(max_pool_connections=max(args.workers, 10))
+    ops = DynamoDBOperations(args.table or manifest['table'], config=config,
+                             fast_path=True, number_mode='decimal')
+    result = import_table(ops, args, manifest, make_item_decoder('decimal'))
+    if not result['success']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()